@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.SQLInstrumentationMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,6 +62,15 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
 ]
 
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL  = 60 * 5
+
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('WEAREBNB_SQL_SAMPLE_RATE', 1.0))
+SQL_DUPLICATE_THRESHOLD         = 5
+
+COMPRESSION_MIN_LENGTH = 200
+BROTLI_QUALITY         = 5
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -101,6 +112,35 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default' : {
+        'BACKEND'  : os.environ.get('WEAREBNB_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION' : os.environ.get('WEAREBNB_CACHE_LOCATION', 'wearebnb'),
+        'TIMEOUT'  : 300,
+    }
+}
+
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
+ROOM_DETAIL_CACHE_TIMEOUT = 60 * 10
+
+AVAILABILITY_DEFAULT_DAYS = 90
+AVAILABILITY_MAX_DAYS     = 366
+
+RESERVATION_DEADLOCK_RETRIES = 2
+
+# Room search
+ROOM_SEARCH_MAX_RESULTS   = 1000
+ROOM_SEARCH_INDEX_MAX_AGE = 60 * 5
+ROOM_PRICE_FACET_BUCKET   = 50000
+ROOM_BITMAP_INDEX_MAX_AGE = 60 * 5
+ROOM_BITMAP_MAX_IDS       = 10000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -170,7 +210,43 @@ CORS_ALLOW_HEADERS = (
 
 ALGORITHM = os.environ.get('WEAREBNB_JWT_ALGORITHM')
 
+# Social login
+KAKAO_USER_URL               = os.environ.get('WEAREBNB_KAKAO_USER_URL', 'https://kapi.kakao.com/v2/user/me')
+SOCIAL_LOGIN_TIMEOUT         = 5
+SOCIAL_LOGIN_MAX_CONNECTIONS = 100
+SOCIAL_LOGIN_RETRIES         = 2
+SOCIAL_LOGIN_BACKOFF         = 0.2
+SOCIAL_PROFILE_CACHE_TIMEOUT = 30
+
 # S3 config
 AWS_ACCESS_KEY = os.environ.get('WEAREBNB_AWS_ACCESS_KEY')
 AWS_SECRET_KEY = os.environ.get('WEAREBNB_AWS_SECRET_KEY')
 S3_BUCKET_NAME = os.environ.get('WEAREBNB_S3_BUCKET_NAME')
+AWS_REGION     = os.environ.get('WEAREBNB_AWS_REGION', 'ap-northeast-2')
+
+S3_MULTIPART_THRESHOLD  = 8 * 1024 * 1024
+S3_MULTIPART_CHUNKSIZE  = 8 * 1024 * 1024
+S3_MAX_CONCURRENCY      = 4
+S3_PRESIGNED_EXPIRES    = 60 * 5
+S3_UPLOAD_MAX_SIZE      = 10 * 1024 * 1024
+S3_UPLOAD_CONTENT_TYPES = ('image/jpeg', 'image/png', 'image/gif', 'image/webp')
+
+# Image variants
+IMAGE_THUMBNAIL_SIZE       = (400, 400)
+IMAGE_WEBP_MAX_SIZE        = (1600, 1600)
+IMAGE_QUALITY              = 80
+IMAGE_FETCH_TIMEOUT        = 10
+IMAGE_PROCESSOR_WORKERS    = int(os.environ.get('WEAREBNB_IMAGE_PROCESSOR_WORKERS', 2))
+IMAGE_PROCESSOR_QUEUE_SIZE = int(os.environ.get('WEAREBNB_IMAGE_PROCESSOR_QUEUE_SIZE', 100))
+
+S3_MAX_POOL_CONNECTIONS = int(os.environ.get('WEAREBNB_S3_MAX_POOL_CONNECTIONS', (IMAGE_PROCESSOR_WORKERS + 1) * S3_MAX_CONCURRENCY))
+
+# Geo search
+GEOHASH_PRECISION = 8
+GEO_MAX_CELLS     = 16
+GEO_MAX_RADIUS_KM = 50
+
+# Password hashing
+BCRYPT_ROUNDS              = 12
+PASSWORD_HASHER_WORKERS    = int(os.environ.get('WEAREBNB_PASSWORD_HASHER_WORKERS', 4))
+PASSWORD_HASHER_QUEUE_SIZE = int(os.environ.get('WEAREBNB_PASSWORD_HASHER_QUEUE_SIZE', 16))
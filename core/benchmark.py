@@ -0,0 +1,336 @@
+import json, time, random, statistics, uuid, jwt
+
+from datetime                     import date, datetime, timedelta
+
+from django.conf                  import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db                    import connection
+from django.db.models             import Q
+from django.test                  import Client
+from django.test.utils            import CaptureQueriesContext
+from django.utils.text            import compress_string
+
+from core.geo                     import encode_geohash
+from core.middleware              import brotli
+from core.responses               import dumps
+from reservations.models          import Reservation, RoomNight
+from reviews.models               import Review
+from reviews.stats                import rebuild_review_stats
+from rooms.models                 import Option, PricingRule, Room, RoomImage, RoomLocation, RoomOption, RoomType
+from rooms.pricing                import rebuild_room_rates
+from rooms.search                 import search_rooms
+from users.models                 import User
+
+BATCH_SIZE = 5000
+PASSWORD   = '12q23w34e45r!'
+HASHED     = '$2b$12$FCUz7aU5O.PbJOc73iGgYuGtNnkFpR2mjrWkcK3/SF4Oqy6r4Hmgi'
+START_DATE = date.today() + timedelta(days=30)
+CENTER     = (37.5172, 127.0473)
+QUERIES    = ('청담동', '숙소 12', '깨끗한 공간', '없는 숙소')
+
+def seed(rooms, reservations, reviews, users, seed=0):
+    rng = random.Random(seed)
+
+    RoomType.objects.bulk_create([RoomType(name=name) for name in ('집 전체', '개인실', '호텔 객실')])
+    Option.objects.bulk_create([Option(name=name) for name in ('무선 인터넷', '주방', '헤어드라이어', '주차', '세탁기')])
+    room_type_ids = list(RoomType.objects.values_list('id', flat=True))
+    option_ids    = list(Option.objects.values_list('id', flat=True))
+
+    User.objects.bulk_create([
+        User(email=f'bench{index}@wearebnb.com', password=HASHED, name=f'bench{index}') for index in range(users)
+    ], batch_size=BATCH_SIZE)
+    user_ids = list(User.objects.values_list('id', flat=True))
+
+    locations = []
+    for index in range(rooms):
+        latitude  = CENTER[0] + rng.uniform(-0.5, 0.5)
+        longitude = CENTER[1] + rng.uniform(-0.5, 0.5)
+        locations.append(RoomLocation(
+            country   = '한국',
+            city      = '서울시',
+            address   = f'한국 서울시 강남구 {rng.choice(["청담동", "삼성동", "역삼동", "논현동"])} {index}',
+            latitude  = round(latitude, 6),
+            longitude = round(longitude, 6),
+            geohash   = encode_geohash(latitude, longitude, settings.GEOHASH_PRECISION),
+        ))
+    RoomLocation.objects.bulk_create(locations, batch_size=BATCH_SIZE)
+    location_ids = list(RoomLocation.objects.order_by('id').values_list('id', flat=True))
+
+    Room.objects.bulk_create([
+        Room(
+            location_id  = location_id,
+            host_user_id = rng.choice(user_ids),
+            room_type_id = rng.choice(room_type_ids),
+            title        = f'벤치마크 숙소 {index}',
+            description  = '넓고 깨끗한 공간에서 힐링시간되세요.',
+            price        = rng.randrange(30000, 300000, 100),
+            max_guest    = rng.randint(1, 8),
+            bedroom      = rng.randint(1, 4),
+            bed          = rng.randint(1, 4),
+            bath         = rng.randint(1, 3),
+            created_at   = date.today(),
+        ) for index, location_id in enumerate(location_ids)
+    ], batch_size=BATCH_SIZE)
+    room_ids = list(Room.objects.order_by('id').values_list('id', flat=True))
+
+    RoomOption.objects.bulk_create([
+        RoomOption(room_id=room_id, option_id=option_id)
+        for room_id in room_ids for option_id in rng.sample(option_ids, rng.randint(1, len(option_ids)))
+    ], batch_size=BATCH_SIZE)
+    RoomImage.objects.bulk_create([
+        RoomImage(room_id=room_id, image_url=f'https://cdn.wearebnb.com/rooms/{room_id}/{index}.jpg')
+        for room_id in room_ids for index in range(3)
+    ], batch_size=BATCH_SIZE)
+    PricingRule.objects.bulk_create([
+        rule for room_id in room_ids for rule in (
+            PricingRule(room_id=room_id, kind=PricingRule.WEEKEND, percent=rng.choice((10, 20, 30))),
+            PricingRule(room_id=room_id, kind=PricingRule.LENGTH_OF_STAY, percent=-10, min_nights=rng.choice((3, 7))),
+            PricingRule(room_id=room_id, kind=PricingRule.SEASON, percent=50, start_date=START_DATE, end_date=START_DATE + timedelta(days=60)),
+        ) if rng.random() < 0.3
+    ], batch_size=BATCH_SIZE)
+    rebuild_room_rates(room_ids)
+
+    next_check_in = {}
+    batch         = []
+    for _ in range(reservations):
+        room_id   = rng.choice(room_ids)
+        check_in  = next_check_in.get(room_id, START_DATE - timedelta(days=365)) + timedelta(days=rng.randint(0, 5))
+        days      = rng.randint(1, 5)
+        check_out = check_in + timedelta(days=days)
+
+        next_check_in[room_id] = check_out
+        batch.append(Reservation(
+            reservation_code = str(uuid.uuid4()),
+            user_id          = rng.choice(user_ids),
+            room_id          = room_id,
+            check_in         = check_in,
+            check_out        = check_out,
+            days             = days,
+            adult            = 1,
+        ))
+
+        if len(batch) == BATCH_SIZE:
+            seed_reservations(batch)
+            batch = []
+    seed_reservations(batch)
+
+    Review.objects.bulk_create([
+        Review(
+            room_id = rng.choice(room_ids),
+            user_id = rng.choice(user_ids),
+            title   = '좋아요',
+            content = '생각보다 따뜻하고 만족',
+            rating  = rng.randint(1, 5),
+        ) for _ in range(reviews)
+    ], batch_size=BATCH_SIZE)
+    rebuild_review_stats()
+
+def seed_reservations(reservations):
+    Reservation.objects.bulk_create(reservations)
+    codes = {reservation.reservation_code : reservation for reservation in reservations}
+
+    RoomNight.objects.bulk_create([
+        RoomNight(room_id=codes[code].room_id, reservation_id=pk, date=codes[code].check_in + timedelta(days=day))
+        for pk, code in Reservation.objects.filter(reservation_code__in=codes).values_list('id', 'reservation_code')
+        for day in range(codes[code].days)
+    ], batch_size=BATCH_SIZE)
+
+class Scenario:
+    def __init__(self, name, method, path, data=None, auth=False, prepare=None):
+        self.name    = name
+        self.method  = method
+        self.path    = path
+        self.data    = data
+        self.auth    = auth
+        self.prepare = prepare
+
+    def build(self, iteration):
+        if self.prepare:
+            return self.prepare(iteration)
+
+        return self.path, self.data(iteration) if callable(self.data) else self.data
+
+    def send(self, client, headers, path, data):
+        send = getattr(client, self.method)
+
+        if data is None:
+            return send(path, **headers)
+
+        return send(path, json.dumps(data), content_type='application/json', **headers)
+
+def scenarios(user, room_id):
+    check_in  = START_DATE + timedelta(days=400)
+    search_in = (START_DATE + timedelta(days=10)).isoformat()
+    search_to = (START_DATE + timedelta(days=13)).isoformat()
+
+    def stay(iteration, offset):
+        first = check_in + timedelta(days=offset + iteration * 3)
+        return {
+            'room'      : room_id,
+            'check_in'  : first.isoformat(),
+            'check_out' : (first + timedelta(days=2)).isoformat(),
+            'adult'     : 1,
+            'children'  : 0,
+        }
+
+    def booked(iteration, offset):
+        data        = stay(iteration, offset)
+        reservation = Reservation.objects.create(
+            reservation_code = str(uuid.uuid4()),
+            user             = user,
+            room_id          = room_id,
+            check_in         = data['check_in'],
+            check_out        = data['check_out'],
+            days             = 2,
+            adult            = 1,
+        )
+        reservation.refresh_from_db()
+        reservation.sync_nights(created=True)
+        return reservation
+
+    def patch(iteration):
+        data = stay(iteration, 20000)
+        return f'/reservations/{booked(iteration, 10000).reservation_code}', {key : data[key] for key in ('check_in', 'check_out', 'adult', 'children')}
+
+    def delete(iteration):
+        return f'/reservations/{booked(iteration, 30000).reservation_code}', None
+
+    return [
+        Scenario('rooms.list',             'get',    '/rooms'),
+        Scenario('rooms.list.filters',     'get',    f'/rooms?guest=2&price_min=50000&price_max=200000&room_type=집 전체&check_in={search_in}&check_out={search_to}'),
+        Scenario('rooms.list.deep_offset', 'get',    '/rooms?sort=-price&offset=900'),
+        Scenario('rooms.list.cursor',      'get',    '/rooms?sort=-review_rating&cursor='),
+        Scenario('rooms.list.bounds',      'get',    '/rooms?sw_lat=37.45&sw_lng=127.0&ne_lat=37.55&ne_lng=127.1'),
+        Scenario('rooms.list.near',        'get',    '/rooms?near=37.5172,127.0473&radius_km=3'),
+        Scenario('rooms.list.search',      'get',    f'/rooms?q={QUERIES[0]}'),
+        Scenario('rooms.list.facets',      'get',    '/rooms?facets=1&guest=2&price_max=200000'),
+        Scenario('rooms.list.options',     'get',    '/rooms?room_option=무선 인터넷&room_option=주방&room_option=주차'),
+        Scenario('rooms.list.total_price', 'get',    f'/rooms?check_in={search_in}&check_out={search_to}&sort=total_price&total_price_max=600000'),
+        Scenario('rooms.detail',           'get',    f'/rooms/{room_id}'),
+        Scenario('reviews.room',           'get',    f'/reviews/{room_id}'),
+        Scenario('reviews.mine',           'get',    '/reviews', auth=True),
+        Scenario('reservations.mine',      'get',    '/reservations', auth=True),
+        Scenario('reservations.room',      'get',    f'/reservations/detail/{room_id}'),
+        Scenario('reservations.calendar',  'get',    f'/reservations/availability/{room_id}?from={search_in}'),
+        Scenario('reservations.create',    'post',   '/reservations', data=lambda iteration: stay(iteration, 0), auth=True),
+        Scenario('reservations.update',    'patch',  None, auth=True, prepare=patch),
+        Scenario('reservations.delete',    'delete', None, auth=True, prepare=delete),
+        Scenario('users.profile',          'get',    '/users/profile', auth=True),
+        Scenario('users.signin',           'post',   '/users/signin', data={'email' : user.email, 'password' : PASSWORD}),
+        Scenario('users.signup',           'post',   '/users/signup', data=lambda iteration: {
+            'name'     : 'bench',
+            'email'    : f'signup{iteration}-{uuid.uuid4().hex[:8]}@wearebnb.com',
+            'password' : PASSWORD,
+        }),
+    ]
+
+SKIPPED = {
+    'users.kakaologin'               : 'calls the Kakao API',
+    'users.kakaologin.async'         : 'calls the Kakao API',
+    'users.profile-upload'           : 'uploads to S3',
+    'users.profile-upload.presigned' : 'signs S3 uploads',
+}
+
+def prepare():
+    user         = User.objects.order_by('id').first()
+    room_id      = Room.objects.order_by('-review_count', 'id').values_list('id', flat=True).first()
+    access_token = jwt.encode({'user_id' : user.id, 'exp' : datetime.utcnow() + timedelta(days=1)}, settings.SECRET_KEY, settings.ALGORITHM)
+
+    return user, room_id, {'HTTP_Authorization' : access_token}
+
+def run(repeat):
+    user, room_id, auth = prepare()
+    client              = Client()
+    results             = {}
+
+    for scenario in scenarios(user, room_id):
+        headers = auth if scenario.auth else {}
+        timings = []
+        queries = 0
+
+        scenario.send(client, headers, *scenario.build(repeat))
+
+        for iteration in range(repeat):
+            path, data = scenario.build(iteration)
+
+            with CaptureQueriesContext(connection) as context:
+                start    = time.perf_counter()
+                response = scenario.send(client, headers, path, data)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            if response.status_code >= 400:
+                raise RuntimeError(f'{scenario.name} returned {response.status_code}: {response.content[:200]}')
+
+            queries = max(queries, len(context.captured_queries))
+
+        results[scenario.name] = {
+            'queries' : queries,
+            'p50_ms'  : round(statistics.median(timings), 2),
+            'p95_ms'  : round(sorted(timings)[max(int(len(timings) * 0.95) - 1, 0)], 2),
+        }
+
+    return results
+
+def timed(func, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return round(statistics.median(timings), 3)
+
+def serialization(repeat):
+    user, room_id, auth = prepare()
+    client              = Client()
+    results             = {}
+
+    for scenario in scenarios(user, room_id):
+        if scenario.method != 'get':
+            continue
+
+        payload = scenario.send(client, auth if scenario.auth else {}, *scenario.build(0)).data
+        content = dumps(payload)
+
+        results[scenario.name] = {
+            'bytes'     : len(content),
+            'gzip'      : len(compress_string(content)),
+            'br'        : len(brotli.compress(content, quality=settings.BROTLI_QUALITY)) if brotli else None,
+            'stdlib_ms' : timed(lambda: json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8'), repeat),
+            'orjson_ms' : timed(lambda: dumps(payload), repeat),
+        }
+
+    return results
+
+def search(repeat):
+    results = {}
+
+    for query in QUERIES:
+        like = Room.objects.filter(Q(title__icontains=query) | Q(description__icontains=query) | Q(location__address__icontains=query))
+
+        results[query] = {
+            'like_matches'  : like.count(),
+            'index_matches' : search_rooms(Room.objects.all(), query)[0].count(),
+            'like_ms'       : timed(lambda: list(like.order_by('id').values_list('id', flat=True)[:15]), repeat),
+            'index_ms'      : timed(lambda: list(search_rooms(Room.objects.all(), query)[0].order_by('-relevance', 'id').values_list('id', flat=True)[:15]), repeat),
+        }
+
+    return results
+
+def regressions(results, baseline, tolerance, queries_only=False):
+    failures = []
+
+    for name, result in results.items():
+        expected = baseline.get(name)
+
+        if not expected:
+            continue
+
+        if result['queries'] > expected['queries']:
+            failures.append(f"{name}: {result['queries']} queries > baseline {expected['queries']}")
+
+        if not queries_only and result['p95_ms'] > expected['p95_ms'] * tolerance:
+            failures.append(f"{name}: p95 {result['p95_ms']}ms > baseline {expected['p95_ms']}ms x {tolerance}")
+
+    return failures
@@ -0,0 +1,53 @@
+from django.core.cache                 import caches
+from django.core.cache.backends.dummy  import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+class ResponseCache:
+    def __init__(self, prefix, timeout, alias='default'):
+        self.prefix  = prefix
+        self.timeout = timeout
+        self.alias   = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def shared(self):
+        return not isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def key(self, pk):
+        return f'{self.prefix}:{pk}'
+
+    def get(self, pk):
+        value = self.cache.get(self.key(pk))
+
+        self.count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, pk, value):
+        self.cache.set(self.key(pk), value, self.timeout)
+
+    def delete_many(self, pks):
+        self.cache.delete_many([self.key(pk) for pk in pks])
+
+    def count(self, name):
+        # Per-process counters can't be read by room_detail_cache_stats, so don't spend cache slots on them.
+        if not self.shared:
+            return
+
+        key = self.key(f'stats:{name}')
+
+        if not self.cache.add(key, 1, None):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, 1, None)
+
+    def stats(self):
+        counters = self.cache.get_many([self.key('stats:hits'), self.key('stats:misses')])
+
+        return {
+            'hits'   : counters.get(self.key('stats:hits'), 0),
+            'misses' : counters.get(self.key('stats:misses'), 0),
+        }
@@ -0,0 +1,48 @@
+import re
+
+from django.db import connections
+
+SQLITE_SCAN   = re.compile(r'^SCAN (?:TABLE )?(\w+)(?! USING)(?: AS \w+)?$')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+def explain(sql, params, using='default'):
+    connection = connections[using]
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+        cursor.execute(f'EXPLAIN {sql}', params)
+
+        if connection.vendor == 'mysql':
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        return [row[0] for row in cursor.fetchall()]
+
+def full_scans(sql, params, using='default'):
+    vendor = connections[using].vendor
+    tables = set()
+
+    for step in explain(sql, params, using):
+        if vendor == 'mysql':
+            if step['type'] == 'ALL':
+                tables.add(step['table'])
+            continue
+
+        match = (SQLITE_SCAN.match(step) if vendor == 'sqlite' else POSTGRES_SCAN.search(step))
+        if match:
+            tables.add(match.group(1))
+
+    return tables
+
+class SelectCollector:
+    def __init__(self):
+        self.selects = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.selects.append((sql, params))
+
+        return execute(sql, params, many, context)
@@ -0,0 +1,78 @@
+import math
+
+from django.db.models           import F, FloatField, ExpressionWrapper
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+BASE32           = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM  = 6371.0088
+KM_PER_DEGREE    = 111.32
+
+def encode_geohash(latitude, longitude, precision):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    latitude, longitude  = float(latitude), float(longitude)
+    geohash, bits, char  = [], 0, 0
+    even                 = True
+
+    while len(geohash) < precision:
+        value, value_range = (longitude, lng_range) if even else (latitude, lat_range)
+        middle             = (value_range[0] + value_range[1]) / 2
+
+        if value >= middle:
+            char           = char << 1 | 1
+            value_range[0] = middle
+        else:
+            char           = char << 1
+            value_range[1] = middle
+
+        even  = not even
+        bits += 1
+
+        if bits == 5:
+            geohash.append(BASE32[char])
+            bits, char = 0, 0
+
+    return ''.join(geohash)
+
+def cell_size(precision):
+    lat_bits = precision * 5 // 2
+    lng_bits = precision * 5 - lat_bits
+
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def covering_cells(sw_lat, sw_lng, ne_lat, ne_lng, precision, max_cells):
+    for level in range(precision, 0, -1):
+        height, width = cell_size(level)
+        rows          = range(int((sw_lat + 90) // height), int((min(ne_lat, 89.999999) + 90) // height) + 1)
+        cols          = range(int((sw_lng + 180) // width), int((min(ne_lng, 179.999999) + 180) // width) + 1)
+
+        if len(rows) * len(cols) <= max_cells:
+            return {
+                encode_geohash(-90 + (row + 0.5) * height, -180 + (col + 0.5) * width, level)
+                for row in rows for col in cols
+            }
+
+    return None
+
+def bounding_box(latitude, longitude, radius_km):
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.000001))
+
+    return (
+        max(latitude - lat_delta, -90.0),
+        max(longitude - lng_delta, -180.0),
+        min(latitude + lat_delta, 90.0),
+        min(longitude + lng_delta, 180.0),
+    )
+
+def haversine_km(latitude_field, longitude_field, latitude, longitude):
+    field_lat = Radians(Cast(F(latitude_field), FloatField()))
+    field_lng = Radians(Cast(F(longitude_field), FloatField()))
+    lat, lng  = math.radians(latitude), math.radians(longitude)
+
+    return ExpressionWrapper(
+        2 * EARTH_RADIUS_KM * ASin(Sqrt(
+            Power(Sin((field_lat - lat) / 2), 2) +
+            math.cos(lat) * Cos(field_lat) * Power(Sin((field_lng - lng) / 2), 2)
+        )),
+        output_field=FloatField()
+    )
@@ -0,0 +1,29 @@
+import httpx, asyncio, weakref
+
+from django.conf import settings
+
+_clients = weakref.WeakKeyDictionary()
+
+async def _client_lifetime(client):
+    # The loop finalises live async generators in shutdown_asyncgens(), which
+    # asyncio.run (and therefore async_to_sync under WSGI) calls before closing it.
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+async def async_client():
+    loop  = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+
+    if entry is None:
+        lifetime = _client_lifetime(httpx.AsyncClient(
+            timeout = httpx.Timeout(settings.SOCIAL_LOGIN_TIMEOUT),
+            limits  = httpx.Limits(
+                max_connections           = settings.SOCIAL_LOGIN_MAX_CONNECTIONS,
+                max_keepalive_connections = settings.SOCIAL_LOGIN_MAX_CONNECTIONS,
+            ),
+        ))
+        entry = _clients[loop] = (await lifetime.__anext__(), lifetime)
+
+    return entry[0]
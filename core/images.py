@@ -0,0 +1,135 @@
+import io, hashlib, logging, requests
+
+from PIL                import Image, ImageOps
+from django.apps        import apps
+from django.conf        import settings
+from django.db          import connections, transaction
+
+from core.storages      import s3_client
+from core.workers       import BoundedExecutor, PoolFull
+
+logger = logging.getLogger('core.images')
+
+TARGETS = {
+    'rooms.RoomImage'     : ('image_url', 'thumbnail_url', 'webp_url'),
+    'reviews.ReviewImage' : ('image_url', 'thumbnail_url', 'webp_url'),
+    'users.User'          : ('profile_image_url', 'profile_thumbnail_url', None),
+}
+
+image_processor = BoundedExecutor('image-processor', settings.IMAGE_PROCESSOR_WORKERS, settings.IMAGE_PROCESSOR_QUEUE_SIZE)
+
+def render(data, size, format):
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        alpha = format == 'WEBP' and ('A' in image.getbands() or 'transparency' in image.info)
+        image = image.convert('RGBA' if alpha else 'RGB')
+        image.thumbnail(size)
+
+        output = io.BytesIO()
+        image.save(output, format, quality=settings.IMAGE_QUALITY)
+
+        return output.getvalue()
+
+def fetch(url):
+    key = s3_client.key(url)
+
+    if key:
+        return s3_client.read(key)
+
+    response = requests.get(url, timeout=settings.IMAGE_FETCH_TIMEOUT)
+    response.raise_for_status()
+
+    return response.content
+
+def process(instance):
+    source, thumbnail_field, webp_field = TARGETS[instance._meta.label]
+    url                                 = getattr(instance, source)
+
+    if not url:
+        return
+
+    data     = fetch(url)
+    digest   = hashlib.sha256(url.encode('utf-8') + data).hexdigest()[:16]
+    prefix   = f'variants/{instance._meta.db_table}/{instance.pk}/{digest}'
+    fields   = [field for field in (thumbnail_field, webp_field) if field]
+    previous = [getattr(instance, field) for field in fields]
+    updates  = {
+        thumbnail_field : s3_client.upload_bytes(render(data, settings.IMAGE_THUMBNAIL_SIZE, 'JPEG'), f'{prefix}/thumbnail.jpg', 'image/jpeg')
+    }
+
+    if webp_field:
+        updates[webp_field] = s3_client.upload_bytes(render(data, settings.IMAGE_WEBP_MAX_SIZE, 'WEBP'), f'{prefix}/image.webp', 'image/webp')
+
+    # Variant keys hash the source url and content so a CDN never serves a stale copy; whichever
+    # set lost (the superseded one, or ours if the source changed meanwhile) is deleted.
+    rows  = type(instance).objects.filter(pk=instance.pk)
+    stale = previous if rows.filter(**{source : url}).update(**updates) else updates.values()
+    live  = set(rows.values_list(*fields).first() or ())
+    keys  = [key for key in map(s3_client.key, set(stale) - live) if key]
+
+    if keys:
+        delete(keys)
+
+def run(label, pk):
+    try:
+        instance = apps.get_model(label).objects.filter(pk=pk).first()
+
+        if instance:
+            process(instance)
+
+        return True
+
+    except Exception:
+        logger.exception('%s %s: image processing failed', label, pk)
+        return False
+
+    finally:
+        connections.close_all()
+
+def submit(label, pk):
+    try:
+        image_processor.submit(run, label, pk)
+    except PoolFull:
+        logger.warning('%s %s: image processing deferred to process_images', label, pk)
+
+def track(instance):
+    """Remembers the source url an instance was loaded with, so schedule() can tell whether a save changed it."""
+    instance._image_source = getattr(instance, TARGETS[instance._meta.label][0])
+
+def schedule(instance, created, update_fields=None):
+    source   = TARGETS[instance._meta.label][0]
+    previous = getattr(instance, '_image_source', None)
+    track(instance)
+
+    if not getattr(instance, source) or (update_fields and source not in update_fields):
+        return
+
+    if not created and getattr(instance, source) == previous:
+        return
+
+    label, pk = instance._meta.label, instance.pk
+    transaction.on_commit(lambda: submit(label, pk))
+
+def delete(keys):
+    try:
+        errors = s3_client.delete_many(keys)
+    except Exception:
+        logger.exception('failed to delete %d replaced images', len(keys))
+        return
+
+    for error in errors:
+        logger.warning('%s: %s', error.get('Key'), error.get('Message'))
+
+def discard(urls):
+    keys = [key for key in map(s3_client.key, urls) if key]
+
+    if not keys:
+        return
+
+    def submit_delete():
+        try:
+            image_processor.submit(delete, keys)
+        except PoolFull:
+            logger.warning('failed to schedule deletion of %d replaced images', len(keys))
+
+    transaction.on_commit(submit_delete)
@@ -0,0 +1,137 @@
+import copy, threading, time
+
+class InProcessIndex:
+    """
+    Lazily built in-memory index over a table.
+
+    Subclasses implement rows(), clear(), add() and discard(). Signals in
+    this process call refresh()/remove() to keep it current, and the whole
+    index is rebuilt once it is older than max_age seconds so writes made
+    by other processes show up eventually. Rebuilds fill a copy outside the
+    lock, so readers keep using the previous index until it is swapped in.
+    """
+    SHARED = ('max_age', 'lock', 'building', 'built_at', 'pending')
+
+    def __init__(self, max_age):
+        self.max_age  = max_age
+        self.lock     = threading.RLock()
+        self.building = threading.Lock()
+        self.built_at = None
+        self.pending  = None
+
+    def rows(self, pks=None):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def add(self, pk, row):
+        raise NotImplementedError
+
+    def discard(self, pk):
+        raise NotImplementedError
+
+    def stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at >= self.max_age
+
+    def ensure(self):
+        if not self.stale():
+            return
+
+        # Only the first build makes readers wait; a stale index keeps serving while one thread rebuilds it.
+        if not self.building.acquire(blocking=self.built_at is None):
+            return
+
+        try:
+            if not self.stale():
+                return
+
+            with self.lock:
+                self.pending = set()
+
+            started = time.monotonic()
+            index   = copy.copy(self)
+            index.clear()
+
+            for pk, row in index.rows():
+                index.add(pk, row)
+
+            with self.lock:
+                pending, self.pending = self.pending, None
+
+                self.__dict__.update({name : value for name, value in vars(index).items() if name not in self.SHARED})
+                self.built_at = started
+
+                # Writes signalled while the copy was filling may have been read before they committed.
+                if pending:
+                    self.reload(pending)
+
+        finally:
+            self.building.release()
+
+    def reload(self, pks):
+        for pk in pks:
+            self.discard(pk)
+
+        for pk, row in self.rows(pks):
+            self.add(pk, row)
+
+    def refresh(self, pks):
+        with self.lock:
+            pks = list(pks)
+            if self.pending is not None:
+                self.pending.update(pks)
+
+            if self.built_at is None:
+                return
+
+            self.reload(pks)
+
+    def remove(self, pks):
+        with self.lock:
+            pks = list(pks)
+            if self.pending is not None:
+                self.pending.update(pks)
+
+            if self.built_at is None:
+                return
+
+            for pk in pks:
+                self.discard(pk)
+
+    def reset(self):
+        with self.lock:
+            self.clear()
+            self.built_at = None
+
+class Bitmap:
+    """Growable bitset over small non-negative integers such as primary keys."""
+    __slots__ = ('bits',)
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def set(self, position):
+        index = position >> 3
+
+        if index >= len(self.bits):
+            self.bits.extend(bytes(index + 1 - len(self.bits)))
+
+        self.bits[index] |= 1 << (position & 7)
+
+    def unset(self, position):
+        index = position >> 3
+
+        if index < len(self.bits):
+            self.bits[index] &= ~(1 << (position & 7)) & 0xFF
+
+    def __int__(self):
+        return int.from_bytes(self.bits, 'little')
+
+def popcount(value):
+    return bin(value).count('1')
+
+def positions(value):
+    data = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+    return [index * 8 + bit for index, byte in enumerate(data) if byte for bit in range(8) if byte >> bit & 1]
@@ -0,0 +1,85 @@
+import json
+
+from django.conf                 import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner          import DiscoverRunner
+from django.test.utils           import setup_test_environment, teardown_test_environment
+
+from core                        import benchmark
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway test database, replay every route and compare latency/query counts with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=1000)
+        parser.add_argument('--reservations', type=int, default=5000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--baseline', default=str(settings.BASE_DIR / 'core' / 'benchmark_baseline.json'))
+        parser.add_argument('--tolerance', type=float, default=2.0, help='allowed p95 latency multiple of the baseline')
+        parser.add_argument('--queries-only', action='store_true', help='only fail on query count regressions')
+        parser.add_argument('--update-baseline', action='store_true')
+        parser.add_argument('--serialization', action='store_true', help='also compare stdlib and orjson encoding of every GET payload')
+        parser.add_argument('--search', action='store_true', help='also compare q= search with the LIKE filters it replaces')
+
+    def handle(self, *args, **options):
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+
+        setup_test_environment()
+        old_config = runner.setup_databases()
+
+        try:
+            benchmark.seed(options['rooms'], options['reservations'], options['reviews'], options['users'])
+            results = benchmark.run(options['repeat'])
+
+            if options['serialization']:
+                encodings = benchmark.serialization(options['repeat'])
+
+            if options['search']:
+                searches = benchmark.search(options['repeat'])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'endpoint':<32}{'queries':>8}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, result in results.items():
+            self.stdout.write(f"{name:<32}{result['queries']:>8}{result['p50_ms']:>10}{result['p95_ms']:>10}")
+
+        for name, reason in benchmark.SKIPPED.items():
+            self.stdout.write(f'{name:<32}skipped ({reason})')
+
+        if options['serialization']:
+            self.stdout.write(f"\n{'endpoint':<32}{'bytes':>9}{'gzip':>9}{'br':>9}{'stdlib ms':>11}{'orjson ms':>11}")
+            for name, result in encodings.items():
+                self.stdout.write(
+                    f"{name:<32}{result['bytes']:>9}{result['gzip']:>9}{str(result['br']):>9}{result['stdlib_ms']:>11}{result['orjson_ms']:>11}"
+                )
+
+        if options['search']:
+            self.stdout.write(f"\n{'query':<32}{'like rows':>11}{'index rows':>11}{'like ms':>10}{'index ms':>10}")
+            for query, result in searches.items():
+                self.stdout.write(
+                    f"{query:<32}{result['like_matches']:>11}{result['index_matches']:>11}{result['like_ms']:>10}{result['index_ms']:>10}"
+                )
+
+        if options['update_baseline']:
+            with open(options['baseline'], 'w') as baseline_file:
+                json.dump(results, baseline_file, indent=4, ensure_ascii=False)
+                baseline_file.write('\n')
+
+            self.stdout.write(self.style.SUCCESS(f"BASELINE_UPDATED {options['baseline']}"))
+            return
+
+        try:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+        except FileNotFoundError:
+            raise CommandError(f"baseline {options['baseline']} not found, run with --update-baseline first")
+
+        failures = benchmark.regressions(results, baseline, options['tolerance'], options['queries_only'])
+
+        if failures:
+            raise CommandError('\n'.join(['BENCHMARK_REGRESSION'] + failures))
+
+        self.stdout.write(self.style.SUCCESS('BENCHMARK_OK'))
@@ -0,0 +1,28 @@
+from concurrent.futures          import ThreadPoolExecutor
+from django.apps                 import apps
+from django.core.management.base import BaseCommand
+
+from core.images                 import TARGETS, run
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and WebP variants for images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--limit', type=int, default=None)
+
+    def handle(self, *args, **options):
+        pending = []
+
+        for label, (source, thumbnail_field, _) in TARGETS.items():
+            rows = apps.get_model(label).objects.filter(**{f'{source}__isnull' : False, f'{thumbnail_field}__isnull' : True})\
+                                                .exclude(**{source : ''})\
+                                                .order_by('pk')\
+                                                .values_list('pk', flat=True)
+
+            pending += [(label, pk) for pk in rows[:options['limit']]]
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            processed = sum(executor.map(lambda target: run(*target), pending))
+
+        self.stdout.write(self.style.SUCCESS(f'IMAGES_PROCESSED {processed}/{len(pending)}'))
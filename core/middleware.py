@@ -0,0 +1,116 @@
+import re, json, time, random, asyncio, logging
+
+from asgiref.sync           import sync_to_async
+from contextlib             import ExitStack
+from django.conf            import settings
+from django.db              import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache     import patch_vary_headers
+
+from core.utils             import QueryCollector
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('core.sql')
+
+accepts_brotli = re.compile(r'\bbr\b').search
+
+class SQLInstrumentationMiddleware:
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        if not self.sampled():
+            return self.get_response(request)
+
+        collector  = QueryCollector()
+        started_at = time.perf_counter()
+
+        with self.instrument(collector):
+            response = self.get_response(request)
+
+        return self.finish(request, response, collector, started_at)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        collector  = QueryCollector()
+        started_at = time.perf_counter()
+        stack      = await sync_to_async(self.instrument)(collector)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        return self.finish(request, response, collector, started_at)
+
+    def sampled(self):
+        return random.random() < settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+
+    def instrument(self, collector):
+        stack = ExitStack()
+
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+
+        return stack
+
+    def finish(self, request, response, collector, started_at):
+        total_ms = (time.perf_counter() - started_at) * 1000
+        db_ms    = collector.duration * 1000
+
+        response['Server-Timing'] = f'db;dur={db_ms:.1f};desc="{collector.count} queries", app;dur={total_ms:.1f}'
+
+        duplicates = collector.duplicates
+        suspected  = {sql : count for sql, count in duplicates.items() if count >= settings.SQL_DUPLICATE_THRESHOLD}
+        log        = logger.warning if suspected else logger.info
+
+        log(json.dumps({
+            'method'     : request.method,
+            'path'       : request.path,
+            'status'     : response.status_code,
+            'queries'    : collector.count,
+            'db_ms'      : round(db_ms, 2),
+            'total_ms'   : round(total_ms, 2),
+            'duplicates' : [{'sql' : sql[:200], 'count' : count} for sql, count in duplicates.items()],
+        }, ensure_ascii=False))
+
+        return response
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if brotli is None or not accepts_brotli(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+
+        if response.streaming or response.has_header('Content-Encoding') or len(response.content) < settings.COMPRESSION_MIN_LENGTH:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content             = compressed
+        response['Content-Length']   = str(len(compressed))
+        response['Content-Encoding'] = 'br'
+
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"(.*)"$', r'W/"\1"', response['ETag'])
+
+        return response
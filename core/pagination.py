@@ -0,0 +1,33 @@
+import json, base64, binascii
+
+from django.db.models import Q
+
+class InvalidCursor(Exception):
+    pass
+
+def encode_cursor(ordering, value, pk):
+    payload = json.dumps([ordering, str(value), pk]).encode('utf-8')
+
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, ordering):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_ordering, value, pk = json.loads(payload)
+
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+    if cursor_ordering != ordering or not isinstance(pk, int):
+        raise InvalidCursor(cursor)
+
+    return value, pk
+
+def keyset_filter(ordering, value, pk):
+    field = ordering.lstrip('-')
+    lookup = 'lt' if ordering.startswith('-') else 'gt'
+
+    if field == 'id':
+        return Q(**{f'id__{lookup}' : pk})
+
+    return Q(**{f'{field}__{lookup}' : value}) | Q(**{field : value, 'id__gt' : pk})
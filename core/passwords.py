@@ -0,0 +1,36 @@
+import bcrypt
+
+from django.conf  import settings
+
+from core.workers import BoundedExecutor, PoolFull
+
+hasher = BoundedExecutor('password-hasher', settings.PASSWORD_HASHER_WORKERS, settings.PASSWORD_HASHER_QUEUE_SIZE)
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check(password, hashed_password):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def hash_password(password):
+    return hasher.run(_hash, password, settings.BCRYPT_ROUNDS)
+
+def check_password(password, hashed_password):
+    return hasher.run(_check, password, hashed_password)
+
+def needs_rehash(hashed_password):
+    try:
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def rehash_if_needed(user, password):
+    if not needs_rehash(user.password):
+        return
+
+    try:
+        user.password = hash_password(password)
+    except PoolFull:
+        return
+
+    user.save(update_fields=['password', 'updated_at'])
@@ -0,0 +1,44 @@
+import orjson
+
+from datetime              import date, datetime, time
+from decimal               import Decimal
+from django.http           import HttpResponse
+from django.utils.timezone import is_aware
+
+def default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+
+    if isinstance(value, datetime):
+        representation = value.isoformat()
+        if value.microsecond:
+            representation = representation[:23] + representation[26:]
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    if isinstance(value, time):
+        if is_aware(value):
+            raise ValueError("JSON can't represent timezone-aware times.")
+        representation = value.isoformat()
+        if value.microsecond:
+            representation = representation[:12]
+        return representation
+
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(data):
+    return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+class JsonResponse(HttpResponse):
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
+
+        self.data = data
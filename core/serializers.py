@@ -0,0 +1,122 @@
+from collections                import defaultdict
+from django.utils.functional    import cached_property
+
+class Field:
+    def __init__(self, source, to=None):
+        self.source = source
+        self.to     = to
+
+    @property
+    def sources(self):
+        return self.source if isinstance(self.source, tuple) else (self.source,)
+
+    def render(self, row):
+        values = [row[source] for source in self.sources]
+
+        if not self.to:
+            return values[0]
+
+        if isinstance(self.source, tuple):
+            return self.to(*values)
+
+        return self.to(values[0]) if values[0] is not None else None
+
+class ListField:
+    def __init__(self, relation, fields, to=None):
+        self.relation = relation
+        self.fields   = fields
+        self.to       = to
+
+    @property
+    def lookups(self):
+        fields = self.fields.values() if isinstance(self.fields, dict) else [self.fields]
+
+        return [f'{self.relation}__{field}' for field in fields]
+
+    def render(self, items):
+        if isinstance(self.fields, dict):
+            items = [dict(zip(self.fields, item)) for item in items]
+        else:
+            items = [item[0] for item in items]
+
+        return self.to(items) if self.to else items
+
+class Serializer:
+    """
+    Declares a response shape as `fields` and renders it from values() rows.
+
+    Plain and `Field` sources (including `fk__column` paths) become a single values() query, which
+    selects only the declared columns and joins the forward relations. Every `ListField` relation is
+    fetched with one more values_list() query for the whole page, so the number of queries does not
+    depend on the number of rows.
+    """
+    fields = {}
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @classmethod
+    def walk(cls, fields=None):
+        for key, field in (fields if fields is not None else cls.fields).items():
+            if isinstance(field, dict):
+                yield from cls.walk(field)
+            else:
+                yield key, Field(field) if isinstance(field, str) else field
+
+    @classmethod
+    def sources(cls):
+        sources = ['pk']
+
+        for _, field in cls.walk():
+            if isinstance(field, Field):
+                sources += [source for source in field.sources if source not in sources]
+
+        return sources
+
+    @classmethod
+    def list_fields(cls):
+        return [field for _, field in cls.walk() if isinstance(field, ListField)]
+
+    @cached_property
+    def rows(self):
+        return list(self.queryset.values(*self.sources()))
+
+    @cached_property
+    def related(self):
+        pks     = [row['pk'] for row in self.rows]
+        related = {}
+
+        if not pks:
+            return related
+
+        for field in self.list_fields():
+            items = defaultdict(list)
+            rows  = self.queryset.model.objects.filter(pk__in=pks, **{f'{field.relation}__isnull' : False})\
+                                               .order_by('pk', f'{field.relation}__pk')\
+                                               .values_list('pk', *field.lookups)
+
+            for pk, *item in rows:
+                items[pk].append(item)
+
+            related[field] = items
+
+        return related
+
+    def render(self, fields, row):
+        result = {}
+
+        for key, field in fields.items():
+            if isinstance(field, dict):
+                result[key] = self.render(field, row)
+            elif isinstance(field, str):
+                result[key] = row[field]
+            elif isinstance(field, ListField):
+                result[key] = field.render(self.related[field].get(row['pk'], []))
+            else:
+                result[key] = field.render(row)
+
+        return result
+
+    @cached_property
+    def data(self):
+        return [self.render(self.fields, row) for row in self.rows]
@@ -1,35 +1,120 @@
+import io
 import boto3
 import uuid
+import threading
 
-from config.settings import AWS_ACCESS_KEY, AWS_SECRET_KEY, S3_BUCKET_NAME
+from boto3.s3.transfer   import TransferConfig
+from botocore.config     import Config
+from botocore.exceptions import ClientError
+from django.conf         import settings
+
+from config.settings     import AWS_ACCESS_KEY, AWS_SECRET_KEY, S3_BUCKET_NAME, AWS_REGION
+
+DELETE_BATCH_SIZE = 1000
 
 class MyS3Client:
-    def __init__(self, access_key, secret_key, bucket_name):
-        boto3_s3 = boto3.client(
-            's3',
-            aws_access_key_id     = access_key,
-            aws_secret_access_key = secret_key
+    def __init__(self, access_key, secret_key, bucket_name, region=AWS_REGION):
+        self.access_key      = access_key
+        self.secret_key      = secret_key
+        self.bucket_name     = bucket_name
+        self.region          = region
+        self.client          = None
+        self.lock            = threading.Lock()
+        self.transfer_config = TransferConfig(
+            multipart_threshold = settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize = settings.S3_MULTIPART_CHUNKSIZE,
+            max_concurrency     = settings.S3_MAX_CONCURRENCY,
         )
-        self.s3_client   = boto3_s3
-        self.bucket_name = bucket_name
 
-    def upload(self, file):
+    @property
+    def s3_client(self):
+        if self.client is None:
+            with self.lock:
+                if self.client is None:
+                    self.client = boto3.session.Session().client(
+                        's3',
+                        aws_access_key_id     = self.access_key,
+                        aws_secret_access_key = self.secret_key,
+                        region_name           = self.region,
+                        config                = Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS)
+                    )
+
+        return self.client
+
+    def url(self, key):
+        return f'https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{key}'
+
+    def key(self, url):
+        prefix = self.url('')
+
+        return url[len(prefix):] if url and url.startswith(prefix) and len(url) > len(prefix) else None
+
+    def upload(self, file, key=None):
         try: 
-            file_id    = str(uuid.uuid4())
+            file_id    = key or str(uuid.uuid4())
             extra_args = { 'ContentType' : file.content_type }
 
             self.s3_client.upload_fileobj(
                     file,
                     self.bucket_name,
                     file_id,
-                    ExtraArgs = extra_args
+                    ExtraArgs = extra_args,
+                    Config    = self.transfer_config
                 )
-            return f'https://{self.bucket_name}.s3.ap-northeast-2.amazonaws.com/{file_id}'
+            return self.url(file_id)
         except:
             return None
 
+    def upload_bytes(self, data, key, content_type):
+        self.s3_client.upload_fileobj(
+                io.BytesIO(data),
+                self.bucket_name,
+                key,
+                ExtraArgs = { 'ContentType' : content_type },
+                Config    = self.transfer_config
+            )
+        return self.url(key)
+
+    def read(self, key):
+        return self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body'].read()
+
+    def presigned_post(self, key, content_type):
+        return self.s3_client.generate_presigned_post(
+            Bucket     = self.bucket_name,
+            Key        = key,
+            Fields     = {'Content-Type' : content_type},
+            Conditions = [
+                {'Content-Type' : content_type},
+                ['content-length-range', 1, settings.S3_UPLOAD_MAX_SIZE],
+            ],
+            ExpiresIn  = settings.S3_PRESIGNED_EXPIRES
+        )
+
+    def exists(self, key):
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+            return True
+        except ClientError:
+            return False
+
     def delete(self, file_name):
-        return self.s3_client.delete_object(bucket=self.bucket_name, Key=f'{file_name}')
+        return self.s3_client.delete_object(Bucket=self.bucket_name, Key=f'{file_name}')
+
+    def delete_many(self, keys):
+        keys   = list(keys)
+        errors = []
+
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            response = self.s3_client.delete_objects(
+                Bucket = self.bucket_name,
+                Delete = {
+                    'Objects' : [{'Key' : key} for key in keys[start:start + DELETE_BATCH_SIZE]],
+                    'Quiet'   : True,
+                }
+            )
+            errors += response.get('Errors', [])
+
+        return errors
 
 s3_client = MyS3Client(AWS_ACCESS_KEY, AWS_SECRET_KEY, S3_BUCKET_NAME)
 
@@ -38,4 +123,4 @@ class FileUpload:
         self.client = client
     
     def upload(self, file):
-        return self.client.upload(file)
\ No newline at end of file
+        return self.client.upload(file)
@@ -1,3 +1,363 @@
-from django.test import TestCase
+import io, gzip, json, brotli, hashlib, threading
 
-# Create your tests here.
+from datetime            import date, datetime, time, timezone
+from decimal             import Decimal
+from moto                import mock_aws
+from PIL                 import Image
+from unittest.mock       import patch
+
+from django.conf         import settings
+from django.db           import connection
+from django.test         import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from core                import benchmark
+from core.benchmark      import regressions
+from core.explain        import SelectCollector, full_scans
+from core.geo            import covering_cells, encode_geohash
+from core.indexes        import Bitmap, InProcessIndex, popcount, positions
+from core.images         import process, schedule
+from core.middleware     import CompressionMiddleware
+from core.responses      import JsonResponse
+from core.storages       import MyS3Client
+from core.workers        import BoundedExecutor, PoolFull
+from reservations.models import Reservation
+from rooms.bitmaps       import room_bitmap_index
+from rooms.models        import Room, RoomImage, RoomLocation, RoomType
+from rooms.search        import room_search_index
+from users.models        import User, hash_social_id
+
+class GeoTest(SimpleTestCase):
+    def test_encode_geohash(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_covering_cells_contain_points_inside_bounds(self):
+        cells = covering_cells(37.52, 127.04, 37.53, 127.05, 8, 16)
+
+        self.assertTrue(len(cells) <= 16)
+        self.assertTrue(any(encode_geohash(37.521927, 127.046626, 8).startswith(cell) for cell in cells))
+        self.assertTrue(any(encode_geohash(37.526105, 127.045747, 8).startswith(cell) for cell in cells))
+
+class BitmapTest(SimpleTestCase):
+    def test_bitmap_and(self):
+        wifi, kitchen = Bitmap(), Bitmap()
+
+        for room_id in (1, 8, 9, 1000):
+            wifi.set(room_id)
+        for room_id in (8, 1000, 1001):
+            kitchen.set(room_id)
+        wifi.unset(8)
+        wifi.unset(5000)
+
+        self.assertEqual(positions(int(wifi)), [1, 9, 1000])
+        self.assertEqual(positions(int(wifi) & int(kitchen)), [1000])
+        self.assertEqual(positions(0), [])
+        self.assertEqual((popcount(int(wifi)), popcount(0)), (3, 0))
+
+class GatedIndex(InProcessIndex):
+    def __init__(self, source):
+        super().__init__(60)
+        self.source  = source
+        self.started = threading.Event()
+        self.gate    = None
+        self.clear()
+
+    def rows(self, pks=None):
+        if pks is None and self.gate:
+            self.started.set()
+            self.gate.wait(5)
+
+        return [(pk, self.source[pk]) for pk in (self.source if pks is None else pks) if pk in self.source]
+
+    def clear(self):
+        self.values = {}
+
+    def add(self, pk, row):
+        self.values[pk] = row
+
+    def discard(self, pk):
+        self.values.pop(pk, None)
+
+    def get(self, pk):
+        self.ensure()
+
+        with self.lock:
+            return self.values.get(pk)
+
+class InProcessIndexTest(SimpleTestCase):
+    def test_rebuild_keeps_serving_the_previous_index(self):
+        source = {1 : 'a'}
+        index  = GatedIndex(source)
+
+        self.assertEqual(index.get(1), 'a')
+
+        source[1]       = 'b'
+        index.built_at -= 60
+        index.gate      = threading.Event()
+        rebuild         = threading.Thread(target=index.ensure)
+        rebuild.start()
+        index.started.wait(5)
+
+        self.assertEqual(index.get(1), 'a')
+
+        source[2] = 'c'
+        index.refresh([2])
+        index.gate.set()
+        rebuild.join()
+
+        self.assertEqual((index.get(1), index.get(2)), ('b', 'c'))
+        self.assertFalse(index.stale())
+
+class BenchmarkRegressionTest(SimpleTestCase):
+    def test_regressions(self):
+        baseline = {'rooms.list' : {'queries' : 3, 'p50_ms' : 5, 'p95_ms' : 10}}
+
+        self.assertEqual(regressions({'rooms.list' : {'queries' : 3, 'p50_ms' : 6, 'p95_ms' : 19}}, baseline, 2), [])
+        self.assertEqual(len(regressions({'rooms.list' : {'queries' : 4, 'p50_ms' : 6, 'p95_ms' : 21}}, baseline, 2)), 2)
+        self.assertEqual(len(regressions({'rooms.list' : {'queries' : 3, 'p50_ms' : 6, 'p95_ms' : 21}}, baseline, 2, queries_only=True)), 0)
+
+class QueryPlanTest(TestCase):
+    # List pages without a selective filter walk rooms in primary key order and stop at the LIMIT.
+    ALLOWED_SCANS = {
+        'rooms.list'        : {'rooms'},
+        'rooms.list.bounds' : {'rooms'},
+        'rooms.list.near'   : {'rooms'},
+        'rooms.list.facets' : {'rooms'},
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmark.seed(rooms=50, reservations=200, reviews=200, users=20)
+
+    def assertIndexed(self, name, selects):
+        for sql, params in selects:
+            self.assertEqual(full_scans(sql, params) - self.ALLOWED_SCANS.get(name, set()), set(), f'{name}: {sql}')
+
+    def test_endpoints_use_indexes(self):
+        user, room_id, auth = benchmark.prepare()
+        client              = Client()
+
+        for index in (room_search_index, room_bitmap_index):
+            index.reset()
+            index.ensure()
+
+        for scenario in benchmark.scenarios(user, room_id):
+            with self.subTest(scenario.name):
+                path, data = scenario.build(0)
+                collector  = SelectCollector()
+
+                with connection.execute_wrapper(collector):
+                    scenario.send(client, auth if scenario.auth else {}, path, data)
+
+                self.assertIndexed(scenario.name, collector.selects)
+
+    def test_lookups_use_indexes(self):
+        code = Reservation.objects.values_list('reservation_code', flat=True).first()
+
+        self.assertIndexed('reservations.code', [
+            Reservation.objects.filter(reservation_code=code).query.sql_with_params(),
+            User.objects.filter(social_id_hash=hash_social_id(1997422419), email='angelmin00@naver.com').query.sql_with_params(),
+        ])
+
+class SQLInstrumentationTest(TestCase):
+    def test_server_timing_header(self):
+        with self.assertLogs('core.sql', level='INFO') as logs:
+            response = self.client.get('/rooms')
+
+        record = json.loads(logs.records[0].getMessage())
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+        self.assertEqual(record['path'], '/rooms')
+        self.assertEqual(record['status'], 200)
+        self.assertTrue(record['queries'] >= 1)
+
+    async def test_server_timing_header_async(self):
+        response = await self.async_client.get('/rooms')
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_request(self):
+        response = self.client.get('/rooms')
+
+        self.assertFalse(response.has_header('Server-Timing'))
+
+class BoundedExecutorTest(SimpleTestCase):
+    def test_rejects_when_full(self):
+        executor = BoundedExecutor('test', 1, 1)
+        release  = threading.Event()
+        futures  = [executor.submit(release.wait), executor.submit(release.wait)]
+
+        with self.assertLogs('core.workers', level='WARNING'), self.assertRaises(PoolFull):
+            executor.submit(release.wait)
+
+        release.set()
+        for future in futures:
+            future.result()
+
+        self.assertEqual(executor.run(sum, [1, 2]), 3)
+        self.assertEqual(executor.metrics.stats()['completed'], 3)
+        self.assertEqual(executor.metrics.stats()['rejected'], 1)
+
+@mock_aws
+class ImageProcessingTest(TestCase):
+    def setUp(self):
+        self.storage = MyS3Client('testing', 'testing', 'wearebnb-test')
+        self.storage.s3_client.create_bucket(
+            Bucket                    = 'wearebnb-test',
+            CreateBucketConfiguration = {'LocationConstraint' : 'ap-northeast-2'}
+        )
+
+        original = io.BytesIO()
+        Image.new('RGBA', (1200, 800), (255, 0, 0, 128)).save(original, 'PNG')
+
+        User.objects.create(id=1, email='host@wearebnb.com', password='password', name='host')
+        RoomType.objects.create(id=1, name='집 전체')
+        RoomLocation.objects.create(id=1, country='한국', city='서울시', address='한국 서울시 강남구 청담동', latitude=37.521927, longitude=127.046626)
+        Room.objects.create(id=1, location_id=1, host_user_id=1, room_type_id=1, title='숙소', description='숙소', price=100000, created_at=date(2021, 11, 1))
+
+        with self.captureOnCommitCallbacks():
+            self.image = RoomImage.objects.create(id=1, room_id=1, image_url=self.storage.upload_bytes(original.getvalue(), 'rooms/1.png', 'image/png'))
+
+        self.prefix = f"variants/room_images/1/{hashlib.sha256(self.image.image_url.encode('utf-8') + original.getvalue()).hexdigest()[:16]}"
+
+        patcher = patch('core.images.s3_client', self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_process_creates_variants(self):
+        process(self.image)
+        self.image.refresh_from_db()
+
+        thumbnail = Image.open(io.BytesIO(self.storage.read(f'{self.prefix}/thumbnail.jpg')))
+        webp      = Image.open(io.BytesIO(self.storage.read(f'{self.prefix}/image.webp')))
+
+        self.assertEqual(self.image.thumbnail_url, self.storage.url(f'{self.prefix}/thumbnail.jpg'))
+        self.assertEqual(self.image.webp_url, self.storage.url(f'{self.prefix}/image.webp'))
+        self.assertEqual((thumbnail.format, thumbnail.size), ('JPEG', (400, 267)))
+        self.assertEqual((webp.format, webp.mode, webp.size), ('WEBP', 'RGBA', (1200, 800)))
+
+    def test_process_replaces_superseded_variants(self):
+        process(self.image)
+        self.image.refresh_from_db()
+        previous = [self.image.thumbnail_url, self.image.webp_url]
+
+        replacement = io.BytesIO()
+        Image.new('RGB', (600, 600), (0, 0, 255)).save(replacement, 'PNG')
+
+        with self.captureOnCommitCallbacks():
+            self.image.image_url = self.storage.upload_bytes(replacement.getvalue(), 'rooms/2.png', 'image/png')
+            self.image.save()
+
+        process(self.image)
+        self.image.refresh_from_db()
+
+        self.assertNotIn(self.image.thumbnail_url, previous)
+        self.assertTrue(self.storage.exists(self.storage.key(self.image.thumbnail_url)))
+        self.assertTrue(self.storage.exists(self.storage.key(self.image.webp_url)))
+        self.assertFalse(any(self.storage.exists(self.storage.key(url)) for url in previous))
+
+    def test_room_list_returns_thumbnail(self):
+        process(self.image)
+
+        response = self.client.get('/rooms')
+
+        self.assertEqual(response.json()['results'][0]['images'], [self.storage.url(f'{self.prefix}/thumbnail.jpg')])
+
+    @patch('core.images.image_processor')
+    def test_schedule_after_commit(self, mocked_processor):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.image.image_url = self.storage.url('rooms/2.png')
+            self.image.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule(self.image, False, update_fields=['room'])
+
+        mocked_processor.submit.assert_called_once()
+        self.assertEqual(mocked_processor.submit.call_args.args[1:], ('rooms.RoomImage', 1))
+
+    @patch('core.images.image_processor')
+    def test_schedule_skips_unchanged_source(self, mocked_processor):
+        image = RoomImage.objects.get(id=self.image.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+            image.image_url = self.storage.url('rooms/2.png')
+            image.save()
+            image.save()
+
+        mocked_processor.submit.assert_called_once()
+
+@mock_aws
+class StorageTest(SimpleTestCase):
+    def setUp(self):
+        self.storage = MyS3Client('testing', 'testing', 'wearebnb-test')
+
+    def test_client_is_created_lazily(self):
+        self.assertIsNone(self.storage.client)
+        self.assertIs(self.storage.s3_client, self.storage.s3_client)
+        self.assertEqual(self.storage.s3_client.meta.config.max_pool_connections, settings.S3_MAX_POOL_CONNECTIONS)
+
+    def test_delete_many(self):
+        self.storage.s3_client.create_bucket(
+            Bucket                    = 'wearebnb-test',
+            CreateBucketConfiguration = {'LocationConstraint' : 'ap-northeast-2'}
+        )
+        for index in range(3):
+            self.storage.upload_bytes(b'file_content', f'profile/1/{index}', 'image/png')
+
+        self.assertEqual(self.storage.delete_many(['profile/1/0', 'profile/1/1']), [])
+        self.assertEqual(
+            [item['Key'] for item in self.storage.s3_client.list_objects_v2(Bucket='wearebnb-test')['Contents']],
+            ['profile/1/2']
+        )
+
+class JsonResponseTest(SimpleTestCase):
+    def test_native_types(self):
+        response = JsonResponse({
+            'price'      : Decimal('150000.00'),
+            'check_in'   : date(2021, 11, 1),
+            'created_at' : datetime(2021, 11, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+            'updated_at' : datetime(2021, 11, 1, 9, 30, 15),
+            'opens_at'   : time(15, 0, 0, 500000),
+            'title'      : '숙소',
+        })
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {
+            'price'      : '150000.00',
+            'check_in'   : '2021-11-01',
+            'created_at' : '2021-11-01T09:30:15.123Z',
+            'updated_at' : '2021-11-01T09:30:15',
+            'opens_at'   : '15:00:00.500',
+            'title'      : '숙소',
+        })
+
+    def test_non_dict_requires_safe_false(self):
+        with self.assertRaises(TypeError):
+            JsonResponse([1, 2])
+
+        self.assertEqual(JsonResponse([1, 2], safe=False).content, b'[1,2]')
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.payload    = {'results' : [{'room_id' : index, 'title' : '넓고 깨끗한 숙소'} for index in range(50)]}
+        self.middleware = CompressionMiddleware(lambda request: JsonResponse(self.payload))
+
+    def test_brotli(self):
+        response = self.middleware(RequestFactory().get('/rooms', HTTP_ACCEPT_ENCODING='gzip, deflate, br'))
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(json.loads(brotli.decompress(response.content)), self.payload)
+
+    def test_gzip(self):
+        response = self.middleware(RequestFactory().get('/rooms', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.payload)
+
+    def test_identity(self):
+        response = self.middleware(RequestFactory().get('/rooms'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content), self.payload)
@@ -1,41 +1,164 @@
-import os, jwt, time
+import os, jwt, copy, time, threading
 
-from django.conf   import settings
-from django.http   import JsonResponse
-from django.db     import connection, reset_queries
+from collections      import Counter, OrderedDict
+from django.conf      import settings
+from django.db        import OperationalError, connection, transaction
+from django.db.models import Count, Max
 
-from users.models  import User
+from core.responses   import JsonResponse
+from users.models     import User
+
+class TokenCache:
+    def __init__(self, size, ttl):
+        self.size    = size
+        self.ttl     = ttl
+        self.entries = OrderedDict()
+        self.tokens  = {}
+        self.lock    = threading.Lock()
+
+    def get(self, token):
+        with self.lock:
+            entry = self.entries.get(token)
+
+            if entry is None:
+                return None
+
+            user, expires_at = entry
+
+            if expires_at <= time.time():
+                self.discard(token)
+                return None
+
+            self.entries.move_to_end(token)
+
+        return copy.copy(user)
+
+    def set(self, token, user, exp=None):
+        expires_at = time.time() + self.ttl
+
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+
+        with self.lock:
+            self.discard(token)
+            self.entries[token] = (copy.copy(user), expires_at)
+            self.tokens.setdefault(user.id, set()).add(token)
+
+            while len(self.entries) > self.size:
+                self.discard(next(iter(self.entries)))
+
+    def invalidate(self, user_id):
+        with self.lock:
+            for token in list(self.tokens.get(user_id, ())):
+                self.discard(token)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tokens.clear()
+
+    def discard(self, token):
+        entry = self.entries.pop(token, None)
+
+        if entry is None:
+            return
+
+        tokens = self.tokens.get(entry[0].id)
+        tokens.discard(token)
+
+        if not tokens:
+            del self.tokens[entry[0].id]
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
 
 def login_required(func):
     def wrapper(self, request, *args, **kwargs):
         try:
             access_token = request.headers.get('Authorization', None)
-            payload      = jwt.decode(access_token, os.environ.get('WEAREBNB_SECRET_KEY'), algorithms=os.environ.get('WEAREBNB_JWT_ALGORITHM'))
-            request.user = User.objects.get(id=payload['user_id'])
-                        
-        except jwt.exceptions.DecodeError:
-            return JsonResponse({'message' : 'INVALID_TOKEN'}, status = 401)            
+            user         = token_cache.get(access_token) if access_token else None
+
+            if user is None:
+                payload = jwt.decode(access_token, os.environ.get('WEAREBNB_SECRET_KEY'), algorithms=os.environ.get('WEAREBNB_JWT_ALGORITHM'))
+                user    = User.objects.get(id=payload['user_id'], deleted_at__isnull=True)
+
+                token_cache.set(access_token, user, payload.get('exp'))
+
+            request.user = user
+
+        except jwt.exceptions.InvalidTokenError:
+            return JsonResponse({'message' : 'INVALID_TOKEN'}, status = 401)
         except User.DoesNotExist:
             return JsonResponse({'message' : 'UNKNOWN_USER'}, status = 401)
 
         return func(self, request, *args, **kwargs)
     return wrapper
 
+def aggregate_etag(queryset, *timestamps):
+    result = queryset.aggregate(count=Count('pk'), **{f'max_{index}' : Max(field) for index, field in enumerate(timestamps)})
+    parts  = [str(result['count'])]
+
+    for index in range(len(timestamps)):
+        updated_at = result[f'max_{index}']
+        parts.append(f'{updated_at.timestamp():.6f}' if updated_at else '0')
+
+    return '-'.join(parts)
+
+def pk_case(model, values, default):
+    if not values:
+        return '%s', [default]
+
+    column = f'{connection.ops.quote_name(model._meta.db_table)}.{connection.ops.quote_name(model._meta.pk.column)}'
+
+    return f'CASE {column} {"WHEN %s THEN %s " * len(values)}ELSE %s END', [value for item in values.items() for value in item] + [default]
+
+MYSQL_DEADLOCK = 1213
+
+def is_deadlock(error):
+    return bool(error.args) and error.args[0] == MYSQL_DEADLOCK
+
+def atomic_with_retry(func, retries):
+    # InnoDB picks a victim when two bookings lock the same room_nights records in opposite
+    # order; rerunning the victim either succeeds or meets the winner's rows as an IntegrityError.
+    for attempt in range(retries + 1):
+        try:
+            with transaction.atomic():
+                return func()
+
+        except OperationalError as error:
+            if not is_deadlock(error) or attempt == retries:
+                raise
+
+class QueryCollector:
+    def __init__(self):
+        self.count      = 0
+        self.duration   = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration        += time.perf_counter() - start
+            self.count           += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return {sql : count for sql, count in self.statements.most_common() if count > 1}
+
 def query_debugger(func):
     def wrapper(*args, **kwargs):
-        try:
-            reset_queries()
-            settings.DEBUG = True
+        collector = QueryCollector()
 
-            start = time.time()
+        with connection.execute_wrapper(collector):
+            start  = time.time()
             result = func(*args, **kwargs)
-            end = time.time()
-            
-            print(f"Function : {func.__name__}")
-            print(f'Number of Queries : {len(connection.queries)}')
-            print(f'Run time: {(end - start):.2f}s')
+            end    = time.time()
+
+        print(f"Function : {func.__name__}")
+        print(f'Number of Queries : {collector.count}')
+        print(f'Run time: {(end - start):.2f}s')
 
-        finally:
-            settings.DEBUG = False
         return result
-    return wrapper
\ No newline at end of file
+    return wrapper
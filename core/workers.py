@@ -0,0 +1,82 @@
+import time, logging, threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('core.workers')
+
+class PoolFull(Exception):
+    pass
+
+class WorkerMetrics:
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.completed = 0
+        self.rejected  = 0
+        self.wait_ms   = 0.0
+        self.run_ms    = 0.0
+        self.max_wait  = 0.0
+        self.max_run   = 0.0
+
+    def record(self, wait_ms, run_ms):
+        with self.lock:
+            self.completed += 1
+            self.wait_ms   += wait_ms
+            self.run_ms    += run_ms
+            self.max_wait   = max(self.max_wait, wait_ms)
+            self.max_run    = max(self.max_run, run_ms)
+
+    def reject(self):
+        with self.lock:
+            self.rejected += 1
+
+    def stats(self):
+        with self.lock:
+            completed = self.completed or 1
+
+            return {
+                'completed'   : self.completed,
+                'rejected'    : self.rejected,
+                'avg_wait_ms' : round(self.wait_ms / completed, 2),
+                'avg_run_ms'  : round(self.run_ms / completed, 2),
+                'max_wait_ms' : round(self.max_wait, 2),
+                'max_run_ms'  : round(self.max_run, 2),
+            }
+
+class BoundedExecutor:
+    def __init__(self, name, max_workers, queue_size):
+        self.name     = name
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self.slots    = threading.BoundedSemaphore(max_workers + queue_size)
+        self.metrics  = WorkerMetrics()
+
+    def submit(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            self.metrics.reject()
+            logger.warning('%s: pool full, task rejected', self.name)
+            raise PoolFull(self.name)
+
+        queued_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.slots.release()
+
+                wait_ms = (started_at - queued_at) * 1000
+                run_ms  = (time.perf_counter() - started_at) * 1000
+
+                self.metrics.record(wait_ms, run_ms)
+                logger.debug('%s: %s waited %.1fms, ran %.1fms', self.name, func.__name__, wait_ms, run_ms)
+
+        try:
+            future = self.executor.submit(task)
+        except RuntimeError:
+            self.slots.release()
+            raise
+
+        return future
+
+    def run(self, func, *args):
+        return self.submit(func, *args).result()
@@ -0,0 +1,41 @@
+import base64
+
+from datetime            import date, datetime, timedelta
+
+from django.conf         import settings
+
+from reservations.models import Reservation
+
+def window(params):
+    start = datetime.strptime(params['from'], '%Y-%m-%d').date() if 'from' in params else date.today()
+    end   = datetime.strptime(params['to'], '%Y-%m-%d').date() if 'to' in params else start + timedelta(days=settings.AVAILABILITY_DEFAULT_DAYS)
+
+    if not 0 < (end - start).days <= settings.AVAILABILITY_MAX_DAYS:
+        raise ValueError(f'invalid availability window {start} - {end}')
+
+    return start, end
+
+def booked_stays(room_id, start, end):
+    return Reservation.objects.filter(room_id = room_id, deleted_at__isnull = True, check_in__lt = end, check_out__gt = start)
+
+def booked_ranges(stays, start, end):
+    ranges = []
+
+    for check_in, check_out in sorted(stays):
+        check_in, check_out = max(check_in, start), min(check_out, end)
+
+        if ranges and check_in <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], check_out)
+        else:
+            ranges.append([check_in, check_out])
+
+    return ranges
+
+def encode_bitmap(ranges, start, end):
+    bitmap = bytearray(((end - start).days + 7) // 8)
+
+    for check_in, check_out in ranges:
+        for day in range((check_in - start).days, (check_out - start).days):
+            bitmap[day // 8] |= 0x80 >> day % 8
+
+    return base64.b64encode(bitmap).decode()
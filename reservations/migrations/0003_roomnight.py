@@ -0,0 +1,48 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:00
+
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_room_nights(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    RoomNight   = apps.get_model('reservations', 'RoomNight')
+
+    for reservation in Reservation.objects.filter(deleted_at__isnull=True).iterator():
+        RoomNight.objects.bulk_create([
+            RoomNight(
+                room_id        = reservation.room_id,
+                reservation_id = reservation.id,
+                date           = reservation.check_in + timedelta(days=day)
+            ) for day in range((reservation.check_out - reservation.check_in).days)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_remove_room_reservation'),
+        ('reservations', '0002_reservation_room'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='reservations.reservation')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rooms.room')),
+            ],
+            options={
+                'db_table': 'room_nights',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='roomnight',
+            index=models.Index(fields=['date', 'room'], name='room_nights_date_room_idx'),
+        ),
+        migrations.RunPython(fill_room_nights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_double_booked_nights(apps, schema_editor):
+    RoomNight = apps.get_model('reservations', 'RoomNight')
+
+    duplicates = RoomNight.objects.values('room_id', 'date')\
+                                  .annotate(nights=Count('id'))\
+                                  .filter(nights__gt=1)
+
+    reservation_ids = set()
+
+    for duplicate in duplicates.iterator():
+        reservation_ids.update(
+            RoomNight.objects.filter(room_id=duplicate['room_id'], date=duplicate['date'])\
+                             .values_list('reservation_id', flat=True)
+        )
+
+    if reservation_ids:
+        raise RuntimeError(
+            'Double-booked reservations must be resolved before adding room_nights_room_date_uniq: '
+            + ', '.join(str(reservation_id) for reservation_id in sorted(reservation_ids))
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0003_roomnight'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_double_booked_nights, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='roomnight',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='room_nights_room_date_uniq'),
+        ),
+    ]
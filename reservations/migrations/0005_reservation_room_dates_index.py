@@ -0,0 +1,17 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_roomnight_unique_room_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'check_in', 'check_out'], name='reservations_room_dates_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from datetime       import timedelta
+
 from django.db      import models
 from core.models    import TimeStampModel
 
@@ -13,4 +15,40 @@ class Reservation(TimeStampModel):
     deleted_at       = models.DateTimeField(null=True)
 
     class Meta:
-        db_table = 'reservations'
\ No newline at end of file
+        db_table = 'reservations'
+        indexes  = [
+            models.Index(fields=['room', 'check_in', 'check_out'], name='reservations_room_dates_idx'),
+            models.Index(fields=['reservation_code'], name='reservations_code_idx'),
+            models.Index(fields=['user', 'check_in'], name='reservations_user_check_in_idx'),
+        ]
+
+    def sync_nights(self, created=False):
+        nights   = set() if self.deleted_at else {self.check_in + timedelta(days=day) for day in range((self.check_out - self.check_in).days)}
+        existing = {} if created else {(room_id, night) : pk for pk, room_id, night in self.nights.values_list('id', 'room_id', 'date')}
+        released = [pk for (room_id, night), pk in existing.items() if room_id != self.room_id or night not in nights]
+
+        # Deleting by primary key locks only the released records, never a gap another booking inserts into.
+        if released:
+            RoomNight.objects.filter(id__in=released).delete()
+
+        RoomNight.objects.bulk_create([
+            RoomNight(
+                room_id     = self.room_id,
+                reservation = self,
+                date        = night
+            ) for night in sorted(nights) if (self.room_id, night) not in existing
+        ])
+
+class RoomNight(models.Model):
+    room        = models.ForeignKey('rooms.Room', on_delete=models.CASCADE)
+    reservation = models.ForeignKey('Reservation', on_delete=models.CASCADE, related_name='nights')
+    date        = models.DateField()
+
+    class Meta:
+        db_table    = 'room_nights'
+        indexes     = [
+            models.Index(fields=['date', 'room'], name='room_nights_date_room_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='room_nights_room_date_uniq'),
+        ]
@@ -0,0 +1,11 @@
+from core.serializers import Serializer
+
+class MyReservationSerializer(Serializer):
+    fields = {
+        'reservation_id' : 'id',
+        'address'        : 'room__location__address',
+        'title'          : 'room__title',
+        'image_url'      : 'thumbnail_url',
+        'check_in'       : 'check_in',
+        'check_out'      : 'check_out',
+    }
@@ -1,14 +1,20 @@
 import json
+import jwt
+import threading
 
+from datetime              import date, datetime, timedelta
 from freezegun             import freeze_time
 
-from django.test           import TestCase, Client
+from django.conf           import settings
+from django.db             import OperationalError, connection
+from django.test           import TestCase, TransactionTestCase, Client
+from unittest              import skipIf
 from unittest.mock         import patch, MagicMock
 
 from users.models          import User
 from reviews.models        import Review
 from rooms.models          import Option, Room, RoomImage, RoomLocation, RoomOption, RoomType
-from reservations.models   import Reservation
+from reservations.models   import Reservation, RoomNight
 
 class ReservationsViewTest(TestCase):
     @freeze_time('2021-11-18')
@@ -308,6 +314,45 @@ class ReservationsViewTest(TestCase):
             }
         })
         
+    def sign_in(self):
+        body = {
+            'email': 'minjbak@naver.com',
+            'password': '12q23w34e45r!'
+        }
+
+        login_response = self.client.post('/users/signin', json.dumps(body), content_type = 'application/json')
+        return {'HTTP_Authorization': login_response.json()['access_token']}
+
+    def test_reservations_view_get_query_count(self):
+        headers = self.sign_in()
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/reservations', **headers)
+
+        self.assertEqual(len(response.json()['results']['reservations']), 3)
+
+    @freeze_time('2021-11-02')
+    def test_reservations_view_get_upcoming_and_past(self):
+        headers  = self.sign_in()
+        upcoming = self.client.get('/reservations?status=upcoming', **headers).json()['results']['reservations']
+        past     = self.client.get('/reservations?status=past', **headers).json()['results']['reservations']
+
+        self.assertEqual([reservation['reservation_id'] for reservation in upcoming], [1])
+        self.assertEqual([reservation['reservation_id'] for reservation in past], [3, 2])
+
+    def test_reservations_view_get_pagination(self):
+        headers  = self.sign_in()
+        response = self.client.get('/reservations?offset=1&limit=1', **headers)
+
+        self.assertEqual([reservation['reservation_id'] for reservation in response.json()['results']['reservations']], [2])
+
+    def test_reservations_view_get_invalid_status(self):
+        headers  = self.sign_in()
+        response = self.client.get('/reservations?status=cancelled', **headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message': 'INVALID_STATUS'})
+        
 class ReservationTest(TestCase):
     def setUp(self):
         self.maxDiff = None
@@ -446,6 +491,69 @@ class ReservationTest(TestCase):
             }
         )
 
+    @freeze_time('2021-11-02')
+    def test_reservations_view_post_method_already_booked(self):
+        user = {
+            'id'       : 1,
+            'email'    : 'minjbak@naver.com',
+            'password' : '12q23w34e45r!',
+        }
+
+        response     = self.client.post('/users/signin', json.dumps(user), content_type='application/json')
+        access_token = response.json()['access_token']
+        headers      = {'HTTP_Authorization': access_token}
+
+        reservation = {
+            'room'      : 1,
+            'check_in'  : '2021-12-25',
+            'check_out' : '2021-12-28',
+            'adult'     : 2,
+            'children'  : 0
+        }
+        overlapping = dict(reservation, check_in='2021-12-27', check_out='2021-12-29')
+        adjacent    = dict(reservation, check_in='2021-12-28', check_out='2021-12-30')
+
+        self.assertEqual(self.client.post('/reservations', json.dumps(reservation), content_type='application/json', **headers).status_code, 200)
+
+        response = self.client.post('/reservations', json.dumps(overlapping), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'message': 'ALREADY_BOOKED'})
+        self.assertEqual(self.client.post('/reservations', json.dumps(adjacent), content_type='application/json', **headers).status_code, 200)
+        self.assertEqual(Reservation.objects.filter(room_id=1).count(), 3)
+        self.assertEqual(RoomNight.objects.filter(room_id=1).count(), 5)
+
+    def test_reservation_view_patch_method_already_booked(self):
+        user = {
+            'id'       : 1,
+            'email'    : 'minjbak@naver.com',
+            'password' : '12q23w34e45r!',
+        }
+
+        response     = self.client.post('/users/signin', json.dumps(user), content_type='application/json')
+        access_token = response.json()['access_token']
+
+        Reservation.objects.get(reservation_code='00002').sync_nights()
+        booked = Reservation.objects.create(reservation_code='00003', user_id=1, room_id=1, check_in=date(2021, 12, 1), check_out=date(2021, 12, 3), days=2, adult=1)
+        booked.sync_nights()
+
+        reservation = {
+            'check_in'  : '2021-11-30',
+            'check_out' : '2021-12-02',
+            'adult'     : 2,
+            'children'  : 0
+        }
+
+        headers  = {'HTTP_Authorization': access_token}
+        response = self.client.patch('/reservations/00002', json.dumps(reservation), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'message': 'ALREADY_BOOKED'})
+        self.assertEqual(
+            list(RoomNight.objects.filter(reservation__reservation_code='00002').values_list('date', flat=True)),
+            [date(2021, 11, 26), date(2021, 11, 27)]
+        )
+
     def test_success_reservation_view_patch_method(self):
         user = {
             'id'       : 1,
@@ -472,6 +580,117 @@ class ReservationTest(TestCase):
             }
         )
 
+    def test_success_reservation_view_patch_method_moves_room_nights(self):
+        user = {
+            'id'       : 1,
+            'email'    : 'minjbak@naver.com',
+            'password' : '12q23w34e45r!',
+        }
+
+        response     = self.client.post('/users/signin', json.dumps(user), content_type='application/json')
+        access_token = response.json()['access_token']
+
+        reservation = {
+            'check_in'  : '2021-11-27',
+            'check_out' : '2021-11-30',
+            'adult'     : 2,
+            'children'  : 0
+        }
+
+        headers  = {'HTTP_Authorization': access_token}
+        response = self.client.patch('/reservations/00002', json.dumps(reservation), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [str(night.date) for night in RoomNight.objects.filter(reservation_id=1).order_by('date')],
+            ['2021-11-27', '2021-11-28', '2021-11-29']
+        )
+
+    def test_reservation_view_patch_method_invalid_date(self):
+        user = {
+            'id'       : 1,
+            'email'    : 'minjbak@naver.com',
+            'password' : '12q23w34e45r!',
+        }
+
+        response     = self.client.post('/users/signin', json.dumps(user), content_type='application/json')
+        access_token = response.json()['access_token']
+
+        reservation = {
+            'check_in'  : '2021-11-28',
+            'check_out' : '2021-11-28',
+            'adult'     : 2,
+            'children'  : 0
+        }
+
+        headers  = {'HTTP_Authorization': access_token}
+        response = self.client.patch('/reservations/00002', json.dumps(reservation), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message': 'INVALID_DATE'})
+        self.assertEqual(Reservation.objects.get(reservation_code='00002').check_out, date(2021, 11, 28))
+
+    def test_sync_nights_releases_only_moved_nights(self):
+        reservation = Reservation.objects.get(reservation_code='00002')
+        reservation.sync_nights(created=True)
+        kept        = RoomNight.objects.get(reservation=reservation, date=date(2021, 11, 27)).id
+
+        reservation.check_in, reservation.check_out = date(2021, 11, 27), date(2021, 11, 30)
+        reservation.sync_nights()
+
+        self.assertEqual(
+            list(RoomNight.objects.filter(reservation=reservation).order_by('date').values_list('date', flat=True)),
+            [date(2021, 11, 27), date(2021, 11, 28), date(2021, 11, 29)]
+        )
+        self.assertEqual(RoomNight.objects.get(reservation=reservation, date=date(2021, 11, 27)).id, kept)
+
+    @freeze_time('2021-11-02')
+    def test_reservations_view_post_method_deadlock(self):
+        user = {
+            'id'       : 1,
+            'email'    : 'minjbak@naver.com',
+            'password' : '12q23w34e45r!',
+        }
+
+        response     = self.client.post('/users/signin', json.dumps(user), content_type='application/json')
+        access_token = response.json()['access_token']
+        headers      = {'HTTP_Authorization': access_token}
+        bulk_create  = RoomNight.objects.bulk_create
+        deadlocks    = []
+
+        def deadlock(times):
+            def bulk_create_or_deadlock(*args, **kwargs):
+                if len(deadlocks) < times:
+                    deadlocks.append(args)
+                    raise OperationalError(1213, 'Deadlock found when trying to get lock; try restarting transaction')
+                return bulk_create(*args, **kwargs)
+            return bulk_create_or_deadlock
+
+        reservation = {
+            'room'      : 1,
+            'check_in'  : '2021-12-25',
+            'check_out' : '2021-12-28',
+            'adult'     : 2,
+            'children'  : 0
+        }
+
+        with patch.object(RoomNight.objects, 'bulk_create', side_effect=deadlock(1)):
+            response = self.client.post('/reservations', json.dumps(reservation), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Reservation.objects.filter(room_id=1).count(), 2)
+        self.assertEqual(RoomNight.objects.filter(room_id=1).count(), 3)
+
+        deadlocks.clear()
+
+        with patch.object(RoomNight.objects, 'bulk_create', side_effect=deadlock(3)):
+            response = self.client.post('/reservations', json.dumps(dict(reservation, room=2)), content_type='application/json', **headers)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'message': 'BOOKING_CONFLICT'})
+        self.assertEqual(len(deadlocks), 3)
+        self.assertFalse(Reservation.objects.filter(room_id=2).exists())
+
     def test_success_reservation_view_delete_method(self):
         user = {
             'id'       : 1,
@@ -505,4 +724,133 @@ class ReservationTest(TestCase):
                     }]
                 }
             }
-        )
\ No newline at end of file
+        )
+
+    def test_reservationdate_view_get_method_etag(self):
+        etag = self.client.get('/reservations/detail/1')['ETag']
+
+        self.assertEqual(self.client.get('/reservations/detail/1', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Reservation.objects.get(reservation_code='00002').delete()
+
+        response = self.client.get('/reservations/detail/1', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_reservationdate_view_get_method_excludes_deleted(self):
+        Reservation.objects.filter(reservation_code='00002').update(deleted_at='2021-11-20')
+
+        response = self.client.get('/reservations/detail/1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': {'reservation_date': []}})
+
+    def test_success_reservation_availability_view_get_method(self):
+        Reservation.objects.bulk_create([
+            Reservation(id=2, reservation_code='00003', user_id=1, room_id=1, check_in='2021-11-28', check_out='2021-11-30', days=2, adult=1),
+            Reservation(id=3, reservation_code='00004', user_id=1, room_id=1, check_in='2021-12-05', check_out='2021-12-20', days=15, adult=1),
+            Reservation(id=4, reservation_code='00005', user_id=1, room_id=1, check_in='2021-11-21', check_out='2021-11-23', days=2, adult=1, deleted_at='2021-11-20'),
+            Reservation(id=5, reservation_code='00006', user_id=1, room_id=2, check_in='2021-11-22', check_out='2021-11-24', days=2, adult=1),
+        ])
+
+        response = self.client.get('/reservations/availability/1?from=2021-11-20&to=2021-12-10')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'results': {
+                'from'   : '2021-11-20',
+                'to'     : '2021-12-10',
+                'bitmap' : 'A8Hw',
+                'booked' : [
+                    ['2021-11-26', '2021-11-30'],
+                    ['2021-12-05', '2021-12-10']
+                ]
+            }
+        })
+
+    def test_reservation_availability_view_get_method_window(self):
+        response = self.client.get('/reservations/availability/1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results']['to'], str(date.today() + timedelta(days=90)))
+
+        for query in ('from=2021-11-20&to=2021-11-20', 'from=2021-11-20&to=2023-11-20', 'from=20211120'):
+            response = self.client.get(f'/reservations/availability/1?{query}')
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'message': 'INVALID_DATE'})
+
+    def test_reservation_availability_view_get_method_etag(self):
+        etag = self.client.get('/reservations/availability/1?from=2021-11-20&to=2021-12-10')['ETag']
+
+        self.assertEqual(self.client.get('/reservations/availability/1?from=2021-11-20&to=2021-12-10', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get('/reservations/availability/1?from=2021-11-20&to=2021-12-11')['ETag'], etag)
+
+        Reservation.objects.create(reservation_code='00003', user_id=1, room_id=1, check_in=date(2021, 12, 1), check_out=date(2021, 12, 3), days=2, adult=1)
+
+        self.assertEqual(self.client.get('/reservations/availability/1?from=2021-11-20&to=2021-12-10', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+@skipIf(connection.vendor == 'sqlite', 'sqlite locks the whole table instead of racing on the unique index')
+class ReservationConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        User.objects.create(
+            id       = 1,
+            email    = 'minjbak@naver.com',
+            password = '$2b$12$FCUz7aU5O.PbJOc73iGgYuGtNnkFpR2mjrWkcK3/SF4Oqy6r4Hmgi',
+            name     = '민정',
+        )
+        RoomLocation.objects.create(
+            id        = 1,
+            country   = '한국',
+            city      = '서울시',
+            address   = '한국 서울시 강남구 청담동 11-5',
+            latitude  = 37.521927,
+            longitude = 127.046626
+        )
+        RoomType.objects.create(
+            id   = 1,
+            name = '집 전체'
+        )
+        Room.objects.create(
+            id           = 1,
+            location_id  = 1,
+            host_user_id = 1,
+            room_type_id = 1,
+            title        = '#방구석영화관2#햇살가득 #방구석캠핑 #무료주차,',
+            description  = '✔ 도보 2분거리 편의점. 3분거리 먹자골목에 위치!!',
+            price        = 98200,
+            max_guest    = 4,
+            created_at   = '2021-11-18',
+        )
+
+    def test_parallel_bookings_of_the_same_nights(self):
+        access_token = jwt.encode({'user_id': 1, 'exp': datetime.utcnow() + timedelta(days=1)}, settings.SECRET_KEY, settings.ALGORITHM)
+        check_in     = datetime.now().date() + timedelta(days=30)
+        barrier      = threading.Barrier(8)
+        statuses     = []
+
+        def book(offset):
+            try:
+                reservation = {
+                    'room'      : 1,
+                    'check_in'  : (check_in + timedelta(days=offset % 2)).isoformat(),
+                    'check_out' : (check_in + timedelta(days=3)).isoformat(),
+                    'adult'     : 1,
+                    'children'  : 0
+                }
+                barrier.wait()
+                response = Client().post('/reservations', json.dumps(reservation), content_type='application/json', HTTP_Authorization=access_token)
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [200] + [409] * 7)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), Reservation.objects.get().days)
@@ -1,9 +1,10 @@
 from django.urls        import path
 
-from reservations.views import ReservationsView, ReservationView, ReservationDateView
+from reservations.views import ReservationsView, ReservationView, ReservationDateView, ReservationAvailabilityView
 
 urlpatterns = [
     path('', ReservationsView.as_view()),
     path('/<str:reservation_code>', ReservationView.as_view()),
-    path('/detail/<int:room_id>', ReservationDateView.as_view())
+    path('/detail/<int:room_id>', ReservationDateView.as_view()),
+    path('/availability/<int:room_id>', ReservationAvailabilityView.as_view())
 ]
\ No newline at end of file
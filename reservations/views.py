@@ -1,12 +1,20 @@
 import json, uuid
 
-from datetime            import datetime
-from django.views        import View
-from django.http         import JsonResponse
-
-from core.utils          import login_required
-from reservations.models import Reservation
-from rooms.models        import Room
+from datetime                     import datetime, date
+from django.conf                  import settings
+from django.views                 import View
+from django.views.decorators.http import condition
+from django.utils.decorators      import method_decorator
+from django.db                    import IntegrityError, OperationalError
+from django.db.models             import OuterRef, Subquery
+from django.db.models.functions   import Coalesce
+
+from core.responses               import JsonResponse
+from core.utils                   import aggregate_etag, atomic_with_retry, is_deadlock, login_required
+from reservations.availability    import booked_ranges, booked_stays, encode_bitmap, window
+from reservations.models          import Reservation
+from reservations.serializers     import MyReservationSerializer
+from rooms.models                 import Room, RoomImage
 
 class ReservationsView(View):
     @login_required
@@ -14,12 +22,12 @@ class ReservationsView(View):
         try:
             data      = json.loads(request.body)
             room      = data['room']
-            check_in  = datetime.strptime(data['check_in'], '%Y-%m-%d')
-            check_out = datetime.strptime(data['check_out'], '%Y-%m-%d')
+            check_in  = datetime.strptime(data['check_in'], '%Y-%m-%d').date()
+            check_out = datetime.strptime(data['check_out'], '%Y-%m-%d').date()
             adult     = data['adult']
             children  = data['children']
 
-            if check_in <= datetime.now():
+            if check_in <= date.today():
                 return JsonResponse({'message': 'INVALID_DATE'}, status=400)
 
             if check_in >= check_out:
@@ -28,18 +36,32 @@ class ReservationsView(View):
             if adult + children > Room.objects.get(id=room).max_guest:
                 return JsonResponse({'message': 'EXCEED THE QUANTITY'}, status=400)
 
-            reservation = Reservation.objects.create(
-                            reservation_code = str(uuid.uuid4()),
-                            user_id          = request.user.id,
-                            room_id          = room,
-                            check_in         = check_in,
-                            check_out        = check_out,  
-                            days             = (check_out - check_in).days,
-                            adult            = adult,
-                            children         = children
-            )
+            def book():
+                reservation = Reservation.objects.create(
+                                reservation_code = str(uuid.uuid4()),
+                                user_id          = request.user.id,
+                                room_id          = room,
+                                check_in         = check_in,
+                                check_out        = check_out,  
+                                days             = (check_out - check_in).days,
+                                adult            = adult,
+                                children         = children
+                )
+                reservation.sync_nights(created=True)
+                return reservation
+
+            reservation = atomic_with_retry(book, settings.RESERVATION_DEADLOCK_RETRIES)
+
             return JsonResponse({'reservation_code': reservation.reservation_code}, status = 200)
 
+        except IntegrityError:
+            return JsonResponse({'message': 'ALREADY_BOOKED'}, status = 409)
+
+        except OperationalError as error:
+            if not is_deadlock(error):
+                raise
+            return JsonResponse({'message': 'BOOKING_CONFLICT'}, status = 409)
+
         except Room.MultipleObjectsReturned:
             return JsonResponse({'message': 'MULTIPLE_ROOM'}, status = 400)
 
@@ -51,17 +73,29 @@ class ReservationsView(View):
 
     @login_required
     def get(self, request):
-        user = request.user
-        
+        user   = request.user
+        status = request.GET.get('status', None)
+        offset = int(request.GET.get('offset', 0))
+        limit  = int(request.GET.get('limit', 20))
+        today  = date.today()
+
+        thumbnails   = RoomImage.objects.filter(room_id = OuterRef('room_id'))\
+                                    .annotate(url = Coalesce('thumbnail_url', 'image_url'))\
+                                    .order_by('id').values('url')[:1]
+        reservations = Reservation.objects.filter(user = user, deleted_at__isnull = True)\
+                                          .annotate(thumbnail_url = Subquery(thumbnails))
+
+        if status == 'upcoming':
+            reservations = reservations.filter(check_out__gt = today).order_by('check_in', 'id')
+        elif status == 'past':
+            reservations = reservations.filter(check_out__lte = today).order_by('-check_in', '-id')
+        elif status is None:
+            reservations = reservations.order_by('id')
+        else:
+            return JsonResponse({'message': 'INVALID_STATUS'}, status = 400)
+
         results = {
-            'reservations': [{
-                'reservation_id': reservation.id,
-                'address'       : reservation.room.location.address,
-                'title'         : reservation.room.title,
-                'image_url'     : reservation.room.room_images.first().image_url,
-                'check_in'      : reservation.check_in,
-                'check_out'     : reservation.check_out
-            } for reservation in Reservation.objects.filter(user = user)]
+            'reservations': MyReservationSerializer(reservations[offset:offset+limit]).data
         }
 
         return JsonResponse({'results' : results}, status = 200)
@@ -74,10 +108,13 @@ class ReservationView(View):
             user        = request.user
             adult       = data['adult']
             children    = data['children']
-            check_in    = datetime.strptime(data['check_in'], '%Y-%m-%d')
-            check_out   = datetime.strptime(data['check_out'], '%Y-%m-%d')
+            check_in    = datetime.strptime(data['check_in'], '%Y-%m-%d').date()
+            check_out   = datetime.strptime(data['check_out'], '%Y-%m-%d').date()
             reservation = Reservation.objects.get(user = user, reservation_code = reservation_code)
 
+            if check_in >= check_out:
+                return JsonResponse({'message': 'INVALID_DATE'}, status=400)
+
             if adult + children > reservation.room.max_guest:
                 return JsonResponse({'message': 'EXCEED THE QUANTITY'}, status=400)
 
@@ -86,10 +123,23 @@ class ReservationView(View):
             reservation.days      = (check_out - check_in).days
             reservation.adult     = data['adult']
             reservation.children  = data['children']
-            reservation.save()
+
+            def move():
+                reservation.save()
+                reservation.sync_nights()
+
+            atomic_with_retry(move, settings.RESERVATION_DEADLOCK_RETRIES)
 
             return JsonResponse({'message': 'SUCCESS'}, status = 200)
 
+        except IntegrityError:
+            return JsonResponse({'message': 'ALREADY_BOOKED'}, status = 409)
+
+        except OperationalError as error:
+            if not is_deadlock(error):
+                raise
+            return JsonResponse({'message': 'BOOKING_CONFLICT'}, status = 409)
+
         except Reservation.MultipleObjectsReturned:
             return JsonResponse({'message': 'MULTIPLE_RESERVATION'}, status = 400)
 
@@ -115,7 +165,11 @@ class ReservationView(View):
         except Reservation.DoesNotExist:
             return JsonResponse({'message': 'DOES_NOT_EXIST_RESERVATION'}, status = 404)
 
+def reservation_dates_etag(request, room_id):
+    return 'reservations-' + aggregate_etag(Reservation.objects.filter(room_id = room_id, deleted_at__isnull = True), 'updated_at')
+
 class ReservationDateView(View):
+    @method_decorator(condition(etag_func=reservation_dates_etag))
     def get(self, request, room_id):
         try:
             result = {
@@ -123,10 +177,39 @@ class ReservationDateView(View):
                     'check_in'     : reservation.check_in,
                     'check_out'    : reservation.check_out,
                     'days'         : reservation.days
-                } for reservation in Reservation.objects.filter(room_id = room_id)]
+                } for reservation in Reservation.objects.filter(room_id = room_id, deleted_at__isnull = True)]
             }
 
             return JsonResponse({'results' : result}, status = 200)
 
         except KeyError:
-            return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
\ No newline at end of file
+            return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+
+def availability_etag(request, room_id):
+    try:
+        start, end = window(request.GET)
+
+    except ValueError:
+        return None
+
+    return f'availability-{room_id}-{start}-{end}-' + aggregate_etag(booked_stays(room_id, start, end), 'updated_at')
+
+class ReservationAvailabilityView(View):
+    @method_decorator(condition(etag_func=availability_etag))
+    def get(self, request, room_id):
+        try:
+            start, end = window(request.GET)
+            stays      = booked_stays(room_id, start, end).values_list('check_in', 'check_out')
+            ranges     = booked_ranges(stays, start, end)
+
+            result = {
+                'from'   : start,
+                'to'     : end,
+                'bitmap' : encode_bitmap(ranges, start, end),
+                'booked' : ranges
+            }
+
+            return JsonResponse({'results' : result}, status = 200)
+
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_DATE'}, status = 400)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reviews.stats               import rebuild_review_stats
+
+class Command(BaseCommand):
+    help = 'Recompute review_count, rating_sum and rating_avg on every room from its reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        rebuild_review_stats(options['room_ids'] or None)
+
+        self.stdout.write(self.style.SUCCESS('REVIEW_STATS_REBUILT'))
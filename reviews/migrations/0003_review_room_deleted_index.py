@@ -0,0 +1,17 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_reviewimage_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['room', 'deleted_at'], name='reviews_room_deleted_idx'),
+        ),
+    ]
@@ -11,10 +11,15 @@ class Review(TimeStampModel):
 
     class Meta:
         db_table = 'reviews'
+        indexes  = [
+            models.Index(fields=['room', 'deleted_at'], name='reviews_room_deleted_idx'),
+        ]
 
 class ReviewImage(models.Model):
-    review    = models.ForeignKey('Review', on_delete=models.CASCADE)
-    image_url = models.CharField(max_length=1000, null=True)
+    review        = models.ForeignKey('Review', on_delete=models.CASCADE)
+    image_url     = models.CharField(max_length=1000, null=True)
+    thumbnail_url = models.CharField(max_length=1000, null=True)
+    webp_url      = models.CharField(max_length=1000, null=True)
     
     class Meta:
         db_table = 'review_images'    
\ No newline at end of file
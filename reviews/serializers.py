@@ -0,0 +1,23 @@
+from datetime         import datetime
+
+from core.serializers import Field, Serializer
+
+class RoomReviewSerializer(Serializer):
+    fields = {
+        'username'     : 'user__name',
+        'user_profile' : 'user__profile_image_url',
+        'title'        : 'title',
+        'content'      : 'content',
+        'rating'       : 'rating',
+        'date'         : Field('created_at', lambda created_at: datetime.strftime(created_at, '%Y/%m')),
+    }
+
+class MyReviewSerializer(Serializer):
+    fields = {
+        'review_id'  : 'id',
+        'user_name'  : 'user__name',
+        'room'       : 'room__title',
+        'title'      : 'title',
+        'content'    : 'content',
+        'created_at' : 'created_at',
+    }
@@ -0,0 +1,51 @@
+from collections               import defaultdict
+
+from django.db.models.signals  import pre_save, post_init, post_save, post_delete
+from django.dispatch           import receiver
+
+from core.images               import schedule, track
+from reviews.models            import Review, ReviewImage
+from reviews.stats             import update_review_stats
+
+@receiver(pre_save, sender=Review)
+def remember_previous_review(sender, instance, raw, **kwargs):
+    if raw or not instance.pk:
+        instance._previous_review = None
+        return
+
+    instance._previous_review = Review.objects.filter(pk=instance.pk)\
+                                              .values('room_id', 'rating', 'deleted_at')\
+                                              .first()
+
+@receiver(post_save, sender=Review)
+def apply_saved_review(sender, instance, raw, **kwargs):
+    if raw:
+        return
+
+    deltas   = defaultdict(lambda: [0, 0.0])
+    previous = getattr(instance, '_previous_review', None)
+
+    if previous and previous['deleted_at'] is None:
+        deltas[previous['room_id']][0] -= 1
+        deltas[previous['room_id']][1] -= previous['rating']
+
+    if instance.deleted_at is None:
+        deltas[instance.room_id][0] += 1
+        deltas[instance.room_id][1] += float(instance.rating)
+
+    for room_id, (count, rating) in deltas.items():
+        update_review_stats(room_id, count, rating)
+
+@receiver(post_delete, sender=Review)
+def apply_deleted_review(sender, instance, **kwargs):
+    if instance.deleted_at is None:
+        update_review_stats(instance.room_id, -1, -float(instance.rating))
+
+@receiver(post_init, sender=ReviewImage)
+def track_review_image(sender, instance, **kwargs):
+    track(instance)
+
+@receiver(post_save, sender=ReviewImage)
+def process_review_image(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule(instance, created, update_fields)
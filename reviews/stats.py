@@ -0,0 +1,31 @@
+from django.db.models           import F, Case, When, Value, Count, Sum, FloatField, ExpressionWrapper, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from reviews.models             import Review
+from rooms.models               import Room
+
+def refresh_rating_avg(rooms):
+    rooms.update(rating_avg=Case(
+        When(review_count=0, then=Value(0.0)),
+        default=ExpressionWrapper(F('rating_sum') / F('review_count'), output_field=FloatField()),
+        output_field=FloatField()
+    ))
+
+def update_review_stats(room_id, count, rating):
+    if not count and not rating:
+        return
+
+    rooms = Room.objects.filter(id=room_id)
+
+    rooms.update(review_count=F('review_count') + count, rating_sum=F('rating_sum') + rating)
+    refresh_rating_avg(rooms)
+
+def rebuild_review_stats(room_ids=None):
+    rooms   = Room.objects.filter(id__in=room_ids) if room_ids is not None else Room.objects.all()
+    reviews = Review.objects.filter(room=OuterRef('pk'), deleted_at__isnull=True).order_by().values('room')
+
+    rooms.update(
+        review_count = Coalesce(Subquery(reviews.annotate(count=Count('id')).values('count')), 0),
+        rating_sum   = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0.0),
+    )
+    refresh_rating_avg(rooms)
@@ -1,11 +1,15 @@
 import json
 
-from freezegun       import freeze_time
+from io                     import StringIO
+from datetime               import datetime
+from freezegun              import freeze_time
 
-from django.test     import TestCase, Client
+from django.test            import TestCase, Client
+from django.core.management import call_command
 
 from users.models          import User
 from reviews.models        import Review
+from reviews.stats         import rebuild_review_stats
 from rooms.models          import Option, Room, RoomImage, RoomLocation, RoomOption, RoomType
 from reservations.models   import Reservation
 
@@ -415,6 +419,7 @@ class ReservationTest(TestCase):
                 created_at = '2021-11-18'
             )
         ])
+        rebuild_review_stats()
 
     def tearDown(self):
         User.objects.all().delete()
@@ -441,4 +446,98 @@ class ReservationTest(TestCase):
                         'review_count'   : 1
                     }
                 }
-            )
\ No newline at end of file
+            )
+class ReviewStatsTest(TestCase):
+    def setUp(self):
+        User.objects.create(
+            id       = 1,
+            email    = 'minjbak@naver.com',
+            password = '$2b$12$FCUz7aU5O.PbJOc73iGgYuGtNnkFpR2mjrWkcK3/SF4Oqy6r4Hmgi',
+            name     = '민정',
+            phone    = '111-1111-1111',
+        )
+        RoomLocation.objects.create(
+            id        = 1,
+            country   = '한국',
+            city      = '서울시',
+            address   = '한국 서울시 강남구 청담동 11-5',
+            latitude  = 37.521927,
+            longitude = 127.046626
+        )
+        RoomType.objects.create(
+            id   = 1,
+            name = '집 전체'
+        )
+        Room.objects.create(
+            id           = 1,
+            location_id  = 1,
+            host_user_id = 1,
+            room_type_id = 1,
+            title        = '#방구석영화관2#햇살가득 #방구석캠핑 #무료주차,',
+            description  = '✔ 도보 2분거리 편의점. 3분거리 먹자골목에 위치!!',
+            price        = 98200,
+            max_guest    = 4,
+            created_at   = '2021-11-18',
+        )
+        self.reviews = [
+            Review.objects.create(room_id=1, user_id=1, title='좋아요', content='좋아요', rating=5),
+            Review.objects.create(room_id=1, user_id=1, title='음...', content='음...', rating=2),
+        ]
+
+    def tearDown(self):
+        User.objects.all().delete()
+        Room.objects.all().delete()
+        RoomLocation.objects.all().delete()
+        RoomType.objects.all().delete()
+        Review.objects.all().delete()
+
+    def assertReviewStats(self, review_count, rating_avg):
+        room = Room.objects.get(id=1)
+
+        self.assertEqual(room.review_count, review_count)
+        self.assertAlmostEqual(room.rating_avg, rating_avg)
+
+    def test_review_stats_created(self):
+        self.assertReviewStats(2, 3.5)
+
+    def test_review_stats_edited(self):
+        self.reviews[1].rating = 4
+        self.reviews[1].save()
+
+        self.assertReviewStats(2, 4.5)
+
+    def test_review_stats_soft_deleted(self):
+        self.reviews[1].deleted_at = datetime.now()
+        self.reviews[1].save()
+
+        self.assertReviewStats(1, 5)
+
+        response = self.client.get('/reviews/1')
+
+        self.assertEqual(response.json()['results']['review_count'], 1)
+        self.assertEqual(len(response.json()['results']['review_info']), 1)
+
+    def test_reviews_view_etag(self):
+        etag = self.client.get('/reviews/1')['ETag']
+
+        self.assertEqual(self.client.get('/reviews/1', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.reviews[1].rating = 4
+        self.reviews[1].save()
+
+        response = self.client.get('/reviews/1', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_review_stats_deleted(self):
+        self.reviews[0].delete()
+
+        self.assertReviewStats(1, 2)
+
+    def test_rebuild_review_stats_command(self):
+        Room.objects.update(review_count=0, rating_sum=0, rating_avg=0)
+
+        call_command('rebuild_review_stats', stdout=StringIO())
+
+        self.assertReviewStats(2, 3.5)
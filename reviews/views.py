@@ -1,32 +1,25 @@
-from django.http      import JsonResponse
-from django.views     import View
-from django.db.models import Count, Avg
-from datetime         import datetime
+from django.utils.decorators      import method_decorator
+from django.views                 import View
+from django.views.decorators.http import condition
 
-from rooms.models     import Room
-from reviews.models   import Review
-from core.utils       import login_required
+from rooms.models                 import Room
+from reviews.models               import Review
+from reviews.serializers          import MyReviewSerializer, RoomReviewSerializer
+from core.responses               import JsonResponse
+from core.utils                   import aggregate_etag, login_required
+
+def reviews_etag(request, room_id):
+    return 'reviews-' + aggregate_etag(Review.objects.filter(room_id = room_id), 'updated_at', 'user__updated_at')
 
 class ReviewsView(View):
+    @method_decorator(condition(etag_func=reviews_etag))
     def get(self, request, room_id):
         try:
-            room           = Room.objects.get(id = room_id)
-            average_rating = room.review_set.aggregate(average = Avg('rating'))['average']
-
-            if not average_rating:
-                average_rating = 0
-
+            room   = Room.objects.only('rating_avg', 'review_count').get(id = room_id)
             result = {
-                'review_info'      : [{
-                        'username'     : review.user.name,
-                        'user_profile'  : review.user.profile_image_url,
-                        'title'        : review.title,
-                        'content'      : review.content,
-                        'rating'       : review.rating,
-                        'date'         : datetime.strftime(review.created_at, '%Y/%m')
-                } for review in room.review_set.all()],
-                        'average_rating' : average_rating,
-                        'review_count'   : room.review_set.aggregate(Count('id'))['id__count']
+                'review_info'      : RoomReviewSerializer(room.review_set.filter(deleted_at__isnull = True)).data,
+                        'average_rating' : room.rating_avg,
+                        'review_count'   : room.review_count
             }
 
             return JsonResponse({'results' : result}, status=200)
@@ -46,13 +39,6 @@ class MyReviewsView(View):
         user = request.user
         
         results = {
-            'reviews': [{
-                'review_id' : review.id,
-                'user_name' : review.user.name,
-                'room'      : review.room.title,
-                'title'     : review.title,
-                'content'   : review.content,
-                'created_at': review.created_at
-            } for review in Review.objects.filter(user = user)]
+            'reviews': MyReviewSerializer(Review.objects.filter(user = user)).data
         }
         return JsonResponse({'results' : results}, status = 200)
@@ -0,0 +1,78 @@
+from collections  import defaultdict
+from functools    import reduce
+
+from django.conf  import settings
+
+from core.indexes import Bitmap, InProcessIndex, popcount, positions
+from rooms.models import Room, RoomOption
+
+class RoomBitmapIndex(InProcessIndex):
+    """One bitmap of room ids per option name and per room type name."""
+    def __init__(self, max_age):
+        super().__init__(max_age)
+        self.clear()
+
+    def rows(self, pks=None):
+        rooms        = Room.objects.all() if pks is None else Room.objects.filter(id__in=pks)
+        room_options = RoomOption.objects.all() if pks is None else RoomOption.objects.filter(room_id__in=pks)
+        options      = defaultdict(list)
+
+        for room_id, name in room_options.values_list('room_id', 'option__name').iterator():
+            options[room_id].append(name)
+
+        for room_id, room_type in rooms.values_list('id', 'room_type__name').iterator():
+            yield room_id, (room_type, options[room_id])
+
+    def clear(self):
+        self.room_types = defaultdict(Bitmap)
+        self.options    = defaultdict(Bitmap)
+        self.rooms      = {}
+
+    def add(self, pk, row):
+        room_type, options = row
+
+        self.room_types[room_type].set(pk)
+        for name in options:
+            self.options[name].set(pk)
+
+        self.rooms[pk] = row
+
+    def discard(self, pk):
+        room_type, options = self.rooms.pop(pk, (None, ()))
+
+        if room_type is not None:
+            self.room_types[room_type].unset(pk)
+
+        for name in options:
+            self.options[name].unset(pk)
+
+    def matching(self, options=(), room_types=()):
+        self.ensure()
+
+        with self.lock:
+            bitmaps = [int(self.options[name]) if name in self.options else 0 for name in set(options)]
+
+            if room_types:
+                bitmaps.append(reduce(int.__or__, (int(self.room_types[name]) for name in room_types if name in self.room_types), 0))
+
+        return reduce(int.__and__, bitmaps) if bitmaps else None
+
+room_bitmap_index = RoomBitmapIndex(settings.ROOM_BITMAP_INDEX_MAX_AGE)
+
+def filter_by_attributes(rooms, options, room_types):
+    if not options and not room_types:
+        return rooms
+
+    matches = room_bitmap_index.matching(options, room_types)
+
+    # Decoding a large match into an IN list would cost more than the joins it replaces.
+    if popcount(matches) <= settings.ROOM_BITMAP_MAX_IDS:
+        return rooms.filter(id__in=positions(matches))
+
+    if room_types:
+        rooms = rooms.filter(room_type__name__in=room_types)
+
+    for name in set(options):
+        rooms = rooms.filter(id__in=RoomOption.objects.filter(option__name=name).values('room_id'))
+
+    return rooms
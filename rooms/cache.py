@@ -0,0 +1,5 @@
+from django.conf import settings
+
+from core.cache  import ResponseCache
+
+room_detail_cache = ResponseCache('room_detail', settings.ROOM_DETAIL_CACHE_TIMEOUT)
@@ -0,0 +1,36 @@
+from django.conf                import settings
+from django.db.models           import CharField, Count, F, IntegerField, Value
+from django.db.models.functions import Cast, Floor
+
+from rooms.models               import Room
+
+def facet_keys():
+    return {
+        'room_type'   : F('room_type__name'),
+        'room_option' : F('options__name'),
+        'price'       : Cast(Floor(F('price') / settings.ROOM_PRICE_FACET_BUCKET), IntegerField()),
+    }
+
+def facet_counts(rooms):
+    matching = Room.objects.filter(id__in=rooms.values('id'))
+    keys     = facet_keys()
+    parts    = [
+        matching.annotate(facet=Value(name, output_field=CharField()), key=Cast(key, CharField()))\
+                .values('facet', 'key')\
+                .annotate(count=Count('id', distinct=True))\
+                .order_by()
+        for name, key in keys.items()
+    ]
+    counts = {name : {} for name in keys}
+
+    for row in parts[0].union(*parts[1:], all=True):
+        if row['key'] is not None:
+            counts[row['facet']][row['key']] = row['count']
+
+    bucket          = settings.ROOM_PRICE_FACET_BUCKET
+    counts['price'] = [
+        {'min' : int(key) * bucket, 'max' : (int(key) + 1) * bucket, 'count' : count}
+        for key, count in sorted(counts['price'].items(), key=lambda item: int(item[0]))
+    ]
+
+    return counts
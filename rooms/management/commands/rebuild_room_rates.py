@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from rooms.pricing               import rebuild_room_rates
+
+class Command(BaseCommand):
+    help = 'Recompute the nightly season markups in room_rates from the season pricing rules, e.g. after a bulk import'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        rebuild_room_rates(options['room_ids'] or None)
+
+        self.stdout.write(self.style.SUCCESS('ROOM_RATES_REBUILT'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rooms.cache                 import room_detail_cache
+
+class Command(BaseCommand):
+    help = 'Print hit/miss counters of the room detail response cache'
+
+    def handle(self, *args, **options):
+        if not room_detail_cache.shared:
+            raise CommandError(
+                f'{room_detail_cache.cache.__class__.__name__} keeps its counters inside each serving process, '
+                'so this command would always report zero. Point WEAREBNB_CACHE_BACKEND at a shared backend '
+                '(e.g. redis or memcached) to collect cache stats.'
+            )
+
+        stats = room_detail_cache.stats()
+        total = stats['hits'] + stats['misses']
+
+        self.stdout.write(f"hits={stats['hits']} misses={stats['misses']} hit_ratio={stats['hits'] / total if total else 0:.2f}")
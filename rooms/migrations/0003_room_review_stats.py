@@ -0,0 +1,48 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:02
+
+from django.db import migrations, models
+from django.db.models import F, Case, When, Value, Count, Sum, FloatField, ExpressionWrapper, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_review_stats(apps, schema_editor):
+    Room    = apps.get_model('rooms', 'Room')
+    Review  = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(room=OuterRef('pk'), deleted_at__isnull=True).order_by().values('room')
+
+    Room.objects.update(
+        review_count = Coalesce(Subquery(reviews.annotate(count=Count('id')).values('count')), 0),
+        rating_sum   = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0.0),
+    )
+    Room.objects.update(rating_avg=Case(
+        When(review_count=0, then=Value(0.0)),
+        default=ExpressionWrapper(F('rating_sum') / F('review_count'), output_field=FloatField()),
+        output_field=FloatField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_remove_room_reservation'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='rating_avg',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='rating_sum',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='review_count',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(fill_review_stats, migrations.RunPython.noop),
+    ]
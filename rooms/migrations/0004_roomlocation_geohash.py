@@ -0,0 +1,30 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.geo import encode_geohash
+
+
+def fill_geohash(apps, schema_editor):
+    RoomLocation = apps.get_model('rooms', 'RoomLocation')
+
+    for location in RoomLocation.objects.iterator():
+        location.geohash = encode_geohash(location.latitude, location.longitude, settings.GEOHASH_PRECISION)
+        location.save(update_fields=['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0003_room_review_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomlocation',
+            name='geohash',
+            field=models.CharField(db_index=True, default='', max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0004_roomlocation_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomimage',
+            name='thumbnail_url',
+            field=models.CharField(max_length=1000, null=True),
+        ),
+        migrations.AddField(
+            model_name='roomimage',
+            name='webp_url',
+            field=models.CharField(max_length=1000, null=True),
+        ),
+    ]
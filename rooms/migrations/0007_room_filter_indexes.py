@@ -0,0 +1,21 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0006_room_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['price', 'id'], name='rooms_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['max_guest', 'price'], name='rooms_max_guest_price_idx'),
+        ),
+    ]
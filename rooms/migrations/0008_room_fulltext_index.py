@@ -0,0 +1,35 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:52
+
+from django.db import migrations
+
+FULLTEXT_INDEXES = [
+    ('rooms', 'rooms_fulltext_idx', 'title, description'),
+    ('room_locations', 'room_locations_fulltext_idx', 'address'),
+]
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f'ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({columns}) WITH PARSER ngram')
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f'ALTER TABLE {table} DROP INDEX {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0007_room_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+    ]
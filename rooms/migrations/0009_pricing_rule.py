@@ -0,0 +1,58 @@
+# Generated by Django 3.2.9 on 2026-10-18 22:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0008_room_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('percent', models.SmallIntegerField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='rooms.room')),
+            ],
+            options={
+                'db_table': 'room_rates',
+            },
+        ),
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('weekend', 'weekend'), ('season', 'season'), ('length_of_stay', 'length of stay')], max_length=20)),
+                ('percent', models.SmallIntegerField()),
+                ('start_date', models.DateField(null=True)),
+                ('end_date', models.DateField(null=True)),
+                ('min_nights', models.PositiveSmallIntegerField(null=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pricing_rules', to='rooms.room')),
+            ],
+            options={
+                'db_table': 'pricing_rules',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='roomrate',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='room_rates_room_date_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='pricingrule',
+            index=models.Index(fields=['kind', 'percent'], name='pricing_rules_kind_percent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricingrule',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('kind', 'season'), _negated=True), models.Q(('end_date__isnull', False), ('start_date__isnull', False), ('start_date__lte', django.db.models.expressions.F('end_date'))), _connector='OR'), name='pricing_rules_season_dates'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricingrule',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('kind', 'length_of_stay'), _negated=True), ('min_nights__isnull', False), _connector='OR'), name='pricing_rules_length_of_stay_min_nights'),
+        ),
+    ]
@@ -1,24 +1,46 @@
-from django.db import models
+from django.conf import settings
+from django.db   import models
+
+from core.geo    import encode_geohash
 
 class Room(models.Model):
-    location    = models.ForeignKey('RoomLocation', on_delete=models.CASCADE)
-    host_user   = models.ForeignKey('users.User', on_delete=models.CASCADE)
-    room_type   = models.ForeignKey('RoomType', on_delete=models.CASCADE)
-    title       = models.CharField(max_length=100)
-    description = models.TextField()
-    price       = models.DecimalField(max_digits=9, decimal_places=2, default=0.0)
-    max_guest   = models.IntegerField(default=0)
-    bedroom     = models.IntegerField(default=0)
-    bed         = models.IntegerField(default=0)
-    bath        = models.IntegerField(default=0)
-    created_at  = models.DateField()
-    options     = models.ManyToManyField('Option', through='RoomOption')
+    location     = models.ForeignKey('RoomLocation', on_delete=models.CASCADE)
+    host_user    = models.ForeignKey('users.User', on_delete=models.CASCADE)
+    room_type    = models.ForeignKey('RoomType', on_delete=models.CASCADE)
+    title        = models.CharField(max_length=100)
+    description  = models.TextField()
+    price        = models.DecimalField(max_digits=9, decimal_places=2, default=0.0)
+    max_guest    = models.IntegerField(default=0)
+    bedroom      = models.IntegerField(default=0)
+    bed          = models.IntegerField(default=0)
+    bath         = models.IntegerField(default=0)
+    created_at   = models.DateField()
+    options      = models.ManyToManyField('Option', through='RoomOption')
+    review_count = models.IntegerField(default=0, db_index=True)
+    rating_sum   = models.FloatField(default=0)
+    rating_avg   = models.FloatField(default=0, db_index=True)
+    version      = models.PositiveIntegerField(default=1)
+
+    COUNTER_FIELDS = ('review_count', 'rating_sum', 'rating_avg', 'version')
     
     class Meta:
         db_table = 'rooms'
-        
+        indexes  = [
+            models.Index(fields=['price', 'id'], name='rooms_price_idx'),
+            models.Index(fields=['max_guest', 'price'], name='rooms_max_guest_price_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+
+        super().save(*args, **kwargs)
     
 class RoomOption(models.Model):
     room   = models.ForeignKey('Room', on_delete=models.CASCADE)
@@ -38,8 +60,10 @@ class Option(models.Model):
         return self.name
     
 class RoomImage(models.Model):
-    room      = models.ForeignKey('Room', on_delete=models.CASCADE, related_name='room_images')
-    image_url = models.CharField(max_length=1000, null=True)
+    room          = models.ForeignKey('Room', on_delete=models.CASCADE, related_name='room_images')
+    image_url     = models.CharField(max_length=1000, null=True)
+    thumbnail_url = models.CharField(max_length=1000, null=True)
+    webp_url      = models.CharField(max_length=1000, null=True)
     
     class Meta:
         db_table = 'room_images'
@@ -62,6 +86,51 @@ class RoomLocation(models.Model):
     address   = models.CharField(max_length=100)
     latitude  = models.DecimalField(max_digits=16, decimal_places=14, default=0.0)
     longitude = models.DecimalField(max_digits=17, decimal_places=14, default=0.0)
+    geohash   = models.CharField(max_length=12, default='', db_index=True)
     
     class Meta:
-        db_table = 'room_locations'
\ No newline at end of file
+        db_table = 'room_locations'
+
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude, settings.GEOHASH_PRECISION)
+        super().save(*args, **kwargs)
+
+class PricingRule(models.Model):
+    WEEKEND        = 'weekend'
+    SEASON         = 'season'
+    LENGTH_OF_STAY = 'length_of_stay'
+    KINDS          = ((WEEKEND, 'weekend'), (SEASON, 'season'), (LENGTH_OF_STAY, 'length of stay'))
+
+    room       = models.ForeignKey('Room', on_delete=models.CASCADE, related_name='pricing_rules')
+    kind       = models.CharField(max_length=20, choices=KINDS)
+    percent    = models.SmallIntegerField()
+    start_date = models.DateField(null=True)
+    end_date   = models.DateField(null=True)
+    min_nights = models.PositiveSmallIntegerField(null=True)
+
+    class Meta:
+        db_table    = 'pricing_rules'
+        indexes     = [
+            models.Index(fields=['kind', 'percent'], name='pricing_rules_kind_percent_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check = ~models.Q(kind='season') | models.Q(start_date__isnull=False, end_date__isnull=False, start_date__lte=models.F('end_date')),
+                name  = 'pricing_rules_season_dates',
+            ),
+            models.CheckConstraint(
+                check = ~models.Q(kind='length_of_stay') | models.Q(min_nights__isnull=False),
+                name  = 'pricing_rules_length_of_stay_min_nights',
+            ),
+        ]
+
+class RoomRate(models.Model):
+    room    = models.ForeignKey('Room', on_delete=models.CASCADE, related_name='rates')
+    date    = models.DateField()
+    percent = models.SmallIntegerField()
+
+    class Meta:
+        db_table    = 'room_rates'
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='room_rates_room_date_uniq'),
+        ]
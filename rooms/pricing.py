@@ -0,0 +1,87 @@
+from datetime                   import timedelta
+
+from django.db.models           import F, FloatField, IntegerField, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+from rooms.models               import PricingRule, RoomRate
+
+WEEKEND_NIGHTS = (4, 5)
+
+def season_rates(rules):
+    """Season markup per (room id, night) for season rules given oldest first, so the newest rule wins a night."""
+    rates = {}
+
+    for rule in rules:
+        for day in range((rule.end_date - rule.start_date).days + 1):
+            rates[rule.room_id, rule.start_date + timedelta(days=day)] = rule.percent
+
+    return {key : percent for key, percent in rates.items() if percent}
+
+def rebuild_room_rates(room_ids=None):
+    rules = PricingRule.objects.filter(kind=PricingRule.SEASON)
+    stale = RoomRate.objects.all()
+
+    if room_ids is not None:
+        room_ids = list(room_ids)
+        rules    = rules.filter(room_id__in=room_ids)
+        stale    = stale.filter(room_id__in=room_ids)
+
+    rates = season_rates(rules.order_by('id').iterator())
+
+    stale.delete()
+    RoomRate.objects.bulk_create([
+        RoomRate(room_id=room_id, date=night, percent=percent) for (room_id, night), percent in rates.items()
+    ], batch_size=1000)
+
+def rule_percent(kind, *ordering, **filters):
+    rules = PricingRule.objects.filter(room_id=OuterRef('pk'), kind=kind, **filters).order_by(*ordering, '-id')
+
+    return Coalesce(Subquery(rules.values('percent')[:1], output_field=IntegerField()), 0)
+
+def season_percent(check_in, check_out, **filters):
+    rates = RoomRate.objects.filter(room_id=OuterRef('pk'), date__gte=check_in, date__lt=check_out, **filters)\
+                            .values('room_id')\
+                            .annotate(total=Sum('percent'))\
+                            .values('total')
+
+    return Coalesce(Subquery(rates, output_field=IntegerField()), 0)
+
+def annotate_total_price(rooms, check_in, check_out):
+    """
+    Sums each night's rate in SQL: the night's season markup from room_rates, compounded by the
+    room's weekend markup on Friday and Saturday nights, with the length-of-stay discount applied
+    to the whole stay. Rates are kept in hundredths of a percent until the final division.
+    """
+    nights   = [check_in + timedelta(days=day) for day in range((check_out - check_in).days)]
+    weekends = [night for night in nights if night.weekday() in WEEKEND_NIGHTS]
+    rates    = (Value(100 * len(nights)) + F('season_percent')) * 100 + F('weekend_percent') * (Value(100 * len(weekends)) + F('weekend_season_percent'))
+
+    return rooms.alias(
+        season_percent         = season_percent(check_in, check_out),
+        weekend_season_percent = season_percent(check_in, check_out, date__in=weekends),
+        weekend_percent        = rule_percent(PricingRule.WEEKEND),
+        stay_percent           = rule_percent(PricingRule.LENGTH_OF_STAY, '-min_nights', min_nights__lte=len(nights)),
+    ).annotate(
+        total_price = Round(F('price') * rates * (Value(100) + F('stay_percent')) / Value(1000000.0), output_field=FloatField())
+    )
+
+def price_ceiling(nights, total_price_max):
+    """
+    Highest nightly price a room can have and still total at most total_price_max over the stay,
+    assuming the steepest discount of every rule kind applies; None when discounts could be total.
+    """
+    discounts = dict(PricingRule.objects.filter(percent__lt=0).values_list('kind').annotate(Min('percent')))
+    factor    = nights * (1 + discounts.get(PricingRule.SEASON, 0) / 100)\
+                       * (1 + discounts.get(PricingRule.WEEKEND, 0) / 100)\
+                       * (1 + discounts.get(PricingRule.LENGTH_OF_STAY, 0) / 100)
+
+    return (total_price_max + 1) / factor if factor > 0 else None
+
+def filter_total_price_max(rooms, nights, total_price_max):
+    ceiling = price_ceiling(nights, total_price_max)
+
+    # A sargable bound on the flat price lets the price index skip rooms no discount can bring under the cap.
+    if ceiling is not None:
+        rooms = rooms.filter(price__lte=ceiling)
+
+    return rooms.filter(total_price__lte=total_price_max)
@@ -0,0 +1,129 @@
+import heapq, math, re
+
+from collections                  import defaultdict
+
+from django.conf                  import settings
+from django.db                    import connection
+from django.db.models             import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from core.indexes                 import InProcessIndex
+from core.utils                   import pk_case
+from rooms.models                 import Room
+
+WORD          = re.compile(r'\w+')
+FIELD_WEIGHTS = {
+    'title'             : 3,
+    'location__address' : 2,
+    'description'       : 1,
+}
+
+MYSQL_ROOM_MATCH      = 'MATCH (rooms.title, rooms.description) AGAINST (%s IN BOOLEAN MODE)'
+MYSQL_LOCATION_MATCH  = 'MATCH (room_locations.address) AGAINST (%s IN BOOLEAN MODE)'
+MYSQL_RELEVANCE       = f'{MYSQL_ROOM_MATCH} + COALESCE((SELECT {MYSQL_LOCATION_MATCH} FROM room_locations WHERE room_locations.id = rooms.location_id), 0)'
+MYSQL_MATCHING_ROOMS  = f'SELECT rooms.id FROM rooms WHERE {MYSQL_ROOM_MATCH}'
+MYSQL_MATCHING_PLACES = f'SELECT room_locations.id FROM room_locations WHERE {MYSQL_LOCATION_MATCH}'
+
+def tokenize(text):
+    tokens = []
+
+    for word in WORD.findall((text or '').lower()):
+        tokens.extend([word] if len(word) == 1 else [word[index:index+2] for index in range(len(word) - 1)])
+
+    return tokens
+
+def boolean_terms(query):
+    """Required (+) boolean mode terms; plain words can never carry MySQL's boolean operators."""
+    return [f'+{word}' for word in WORD.findall((query or '').lower())]
+
+class RoomSearchIndex(InProcessIndex):
+    """Character bigram inverted index, the same tokens MySQL's ngram parser produces."""
+    def __init__(self, max_age):
+        super().__init__(max_age)
+        self.clear()
+
+    def rows(self, pks=None):
+        rooms = Room.objects.all() if pks is None else Room.objects.filter(id__in=pks)
+
+        for row in rooms.values('id', *FIELD_WEIGHTS).iterator():
+            yield row['id'], row
+
+    def clear(self):
+        self.postings = defaultdict(dict)
+        self.tokens   = {}
+
+    def add(self, pk, row):
+        weights = defaultdict(int)
+
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(row[field]):
+                weights[token] += weight
+
+        for token, weight in weights.items():
+            self.postings[token][pk] = weight
+
+        self.tokens[pk] = list(weights)
+
+    def discard(self, pk):
+        for token in self.tokens.pop(pk, ()):
+            postings = self.postings[token]
+            postings.pop(pk, None)
+
+            if not postings:
+                del self.postings[token]
+
+    def search(self, query):
+        tokens = set(tokenize(query))
+
+        self.ensure()
+
+        with self.lock:
+            postings = sorted((self.postings.get(token, {}) for token in tokens), key=len)
+
+            if not postings or not postings[0]:
+                return {}
+
+            total    = len(self.tokens)
+            weighted = [(posting, math.log(1 + total / len(posting))) for posting in postings]
+
+            return {
+                pk : sum(posting[pk] * idf for posting, idf in weighted)
+                for pk in set(postings[0]).intersection(*postings[1:])
+            }
+
+room_search_index = RoomSearchIndex(settings.ROOM_SEARCH_INDEX_MAX_AGE)
+
+def search_rooms(rooms, query):
+    """
+    Narrows the already filtered rooms to those containing every query term, in the room text or
+    its address, annotated with relevance. Also returns whether the in-process ranking was cut at
+    ROOM_SEARCH_MAX_RESULTS.
+    """
+    terms = boolean_terms(query)
+
+    if not terms:
+        return rooms.none().annotate(relevance=Value(0.0, output_field=FloatField())), False
+
+    if connection.vendor == 'mysql':
+        matches = Q()
+
+        for term in terms:
+            matches &= Q(id__in=RawSQL(MYSQL_MATCHING_ROOMS, [term])) | Q(location_id__in=RawSQL(MYSQL_MATCHING_PLACES, [term]))
+
+        query = ' '.join(terms)
+
+        return rooms.filter(matches).annotate(relevance=RawSQL(MYSQL_RELEVANCE, [query, query], output_field=FloatField())), False
+
+    limit  = settings.ROOM_SEARCH_MAX_RESULTS
+    scores = room_search_index.search(query)
+
+    # Cap only what survives the other filters, so the cap never hides a room they would keep.
+    if len(scores) > limit:
+        scores = {pk : scores[pk] for pk in rooms.values_list('id', flat=True).iterator() if pk in scores}
+
+    ranked = {pk : scores[pk] for pk in heapq.nsmallest(limit, scores, key=lambda pk: (-scores[pk], pk))}
+
+    if not ranked:
+        return rooms.none().annotate(relevance=Value(0.0, output_field=FloatField())), False
+
+    return rooms.filter(id__in=list(ranked)).annotate(relevance=RawSQL(*pk_case(Room, ranked, 0.0), output_field=FloatField())), len(scores) > limit
@@ -0,0 +1,51 @@
+from core.serializers import Field, ListField, Serializer
+
+class RoomListSerializer(Serializer):
+    fields = {
+        'room_id'      : 'id',
+        'title'        : 'title',
+        'price'        : Field('price', float),
+        'room_detail'  : {
+            'max_guest' : 'max_guest',
+            'bedroom'   : 'bedroom',
+            'bed'       : 'bed',
+            'bath'      : 'bath',
+        },
+        'room_type'    : 'room_type__name',
+        'room_options' : ListField('options', 'name'),
+        'review'       : 'review_count',
+        'rating'       : Field(('rating_avg', 'review_count'), lambda rating_avg, review_count: rating_avg if review_count else None),
+        'latitude'     : Field('location__latitude', float),
+        'longitude'    : Field('location__longitude', float),
+        'address'      : 'location__address',
+        'images'       : ListField(
+            'room_images',
+            {'thumbnail_url' : 'thumbnail_url', 'image_url' : 'image_url'},
+            lambda images: [image['thumbnail_url'] or image['image_url'] for image in images]
+        ),
+    }
+
+class StayListSerializer(RoomListSerializer):
+    fields = {
+        **RoomListSerializer.fields,
+        'total_price' : Field('total_price', int),
+    }
+
+class RoomDetailSerializer(Serializer):
+    fields = {
+        'id'          : 'id',
+        'host'        : 'host_user__name',
+        'room_type'   : 'room_type__name',
+        'title'       : 'title',
+        'description' : 'description',
+        'price'       : Field('price', lambda price: round(price, 0)),
+        'max_guest'   : 'max_guest',
+        'bedroom'     : 'bedroom',
+        'bed'         : 'bed',
+        'bath'        : 'bath',
+        'room_option' : ListField('options', {'roomOption_name' : 'name', 'roomOption_url' : 'image_url'}),
+        'room_image'  : ListField('room_images', 'image_url'),
+        'location'    : 'location__address',
+        'latitude'    : Field('location__latitude', float),
+        'longitude'   : Field('location__longitude', float),
+    }
@@ -0,0 +1,84 @@
+from django.db.models         import F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch          import receiver
+
+from core.images              import schedule, track
+from rooms.cache              import room_detail_cache
+from rooms.bitmaps            import room_bitmap_index
+from rooms.models             import Option, PricingRule, Room, RoomImage, RoomLocation, RoomOption, RoomType
+from rooms.pricing            import rebuild_room_rates
+from rooms.search             import room_search_index
+from users.models             import User
+
+def touch_rooms(room_ids):
+    room_ids = list(room_ids)
+
+    Room.objects.filter(id__in=room_ids).update(version=F('version') + 1)
+    room_detail_cache.delete_many(room_ids)
+
+@receiver([post_save, post_delete], sender=Room)
+def invalidate_room(sender, instance, **kwargs):
+    touch_rooms([instance.id])
+
+@receiver([post_save, post_delete], sender=RoomOption)
+@receiver([post_save, post_delete], sender=RoomImage)
+def invalidate_room_relation(sender, instance, **kwargs):
+    touch_rooms([instance.room_id])
+
+@receiver(post_init, sender=RoomImage)
+def track_room_image(sender, instance, **kwargs):
+    track(instance)
+
+@receiver(post_save, sender=RoomImage)
+def process_room_image(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule(instance, created, update_fields)
+
+@receiver([post_save, post_delete], sender=RoomLocation)
+def invalidate_location_rooms(sender, instance, **kwargs):
+    touch_rooms(Room.objects.filter(location_id=instance.id).values_list('id', flat=True))
+
+@receiver([post_save, post_delete], sender=RoomType)
+def invalidate_room_type_rooms(sender, instance, **kwargs):
+    touch_rooms(Room.objects.filter(room_type_id=instance.id).values_list('id', flat=True))
+
+@receiver([post_save, post_delete], sender=Option)
+def invalidate_option_rooms(sender, instance, **kwargs):
+    touch_rooms(RoomOption.objects.filter(option_id=instance.id).values_list('room_id', flat=True))
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_host_rooms(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'name' not in update_fields:
+        return
+
+    touch_rooms(Room.objects.filter(host_user_id=instance.id).values_list('id', flat=True))
+
+@receiver(post_save, sender=Room)
+def index_room(sender, instance, **kwargs):
+    room_search_index.refresh([instance.id])
+    room_bitmap_index.refresh([instance.id])
+
+@receiver(post_delete, sender=Room)
+def unindex_room(sender, instance, **kwargs):
+    room_search_index.remove([instance.id])
+    room_bitmap_index.remove([instance.id])
+
+@receiver(post_save, sender=RoomLocation)
+def index_location_rooms(sender, instance, **kwargs):
+    room_search_index.refresh(Room.objects.filter(location_id=instance.id).values_list('id', flat=True))
+
+@receiver([post_save, post_delete], sender=RoomOption)
+def index_room_options(sender, instance, **kwargs):
+    room_bitmap_index.refresh([instance.room_id])
+
+@receiver(post_save, sender=Option)
+def index_option_rooms(sender, instance, **kwargs):
+    room_bitmap_index.refresh(RoomOption.objects.filter(option_id=instance.id).values_list('room_id', flat=True))
+
+@receiver(post_save, sender=RoomType)
+def index_room_type_rooms(sender, instance, **kwargs):
+    room_bitmap_index.refresh(Room.objects.filter(room_type_id=instance.id).values_list('id', flat=True))
+
+@receiver([post_save, post_delete], sender=PricingRule)
+def rebuild_pricing_rule_rates(sender, instance, **kwargs):
+    rebuild_room_rates([instance.room_id])
@@ -1,12 +1,28 @@
-from django.test            import TestCase, Client
+import tempfile
+
+from datetime               import date
+from io                     import StringIO
+from unittest.mock          import patch
+
+from django.test            import TestCase, Client, override_settings
+from django.core.cache      import cache
+from django.core.management import CommandError, call_command
+from django.db              import IntegrityError, transaction
 
 from users.models           import User
 from reviews.models         import Review
-from rooms.models           import Option, Room, RoomImage, RoomLocation, RoomOption, RoomType
+from reviews.stats          import rebuild_review_stats
+from rooms.bitmaps          import room_bitmap_index
+from rooms.cache            import room_detail_cache
+from rooms.models           import Option, PricingRule, Room, RoomImage, RoomLocation, RoomOption, RoomRate, RoomType
+from rooms.pricing          import price_ceiling
+from rooms.search           import boolean_terms, room_search_index, tokenize
 from reservations.models    import Reservation
 
 class RoomListTest(TestCase):
     def setUp(self):
+        room_search_index.reset()
+        room_bitmap_index.reset()
         self.client = Client()
         self.maxDiff = None 
         User.objects.bulk_create([
@@ -238,6 +254,7 @@ class RoomListTest(TestCase):
                 created_at = '2021-11-18'
             )
         ])
+        rebuild_review_stats()
 
     def tearDown(self):
         User.objects.all().delete()
@@ -340,6 +357,7 @@ class RoomListTest(TestCase):
                     "title": "#방구석영화관2#햇살가득 #방구석캠핑 #무료주차,",
                     "price": 98200.0,
                     "days": 17,
+                    "total_price": 1669400,
                     "room_detail": {
                         "max_guest": 4,
                         "bedroom": 1,
@@ -362,8 +380,299 @@ class RoomListTest(TestCase):
             ]
         })
 
+    def test_room_list_view_get_method_excludes_enclosing_reservation(self):
+        reservation = Reservation.objects.create(
+            reservation_code = '00000004',
+            room_id          = 1,
+            user_id          = 2,
+            check_in         = '2021-12-01',
+            check_out        = '2021-12-10',
+            days             = 9,
+            adult            = 2,
+            children         = 0
+        )
+        reservation.refresh_from_db()
+        reservation.sync_nights()
+
+        response = self.client.get('/rooms?check_in=2021-12-03&check_out=2021-12-05')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [2, 3])
+
+    def test_room_list_view_get_method_cursor_pagination_success(self):
+        room_ids = []
+        cursor   = ''
+
+        while cursor is not None:
+            response = self.client.get('/rooms', {'sort' : '-price', 'limit' : 2, 'cursor' : cursor})
+            self.assertEqual(response.status_code, 200)
+
+            room_ids += [room['room_id'] for room in response.json()['results']]
+            cursor    = response.json()['next_cursor']
+
+        self.assertEqual(room_ids, [2, 1, 3])
+
+    def test_room_list_view_get_method_cursor_pagination_by_rating_success(self):
+        first_page  = self.client.get('/rooms', {'sort' : '-review_rating', 'limit' : 1, 'cursor' : ''}).json()
+        second_page = self.client.get('/rooms', {'sort' : '-review_rating', 'limit' : 1, 'cursor' : first_page['next_cursor']}).json()
+
+        self.assertEqual(first_page['results'][0]['room_id'], 1)
+        self.assertEqual(second_page['results'][0]['room_id'], 3)
+
+    def test_room_list_view_get_method_invalid_cursor(self):
+        response = self.client.get('/rooms', {'sort' : 'price', 'cursor' : 'invalid'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_CURSOR'})
+
+    def test_room_list_view_get_method_invalid_sort(self):
+        response = self.client.get('/rooms', {'sort' : 'title'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_SORT'})
+
+    def test_room_list_view_get_method_bounds_success(self):
+        for location in RoomLocation.objects.all():
+            location.save()
+
+        response = self.client.get('/rooms?sw_lat=37.52&sw_lng=127.04&ne_lat=37.53&ne_lng=127.05')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [1, 3])
+
+    def test_room_list_view_get_method_radius_success(self):
+        for location in RoomLocation.objects.all():
+            location.save()
+
+        response = self.client.get('/rooms?near=37.521927,127.046626&radius_km=0.6')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [1, 3])
+
+    def test_room_list_view_get_method_invalid_location(self):
+        response = self.client.get('/rooms?sw_lat=37.53&sw_lng=127.04&ne_lat=37.52')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_LOCATION'})
+
+    def test_room_list_view_get_method_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/rooms')
+
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('청담동 L7, a'), ['청담', '담동', 'l7', 'a'])
+
+    def test_room_list_view_get_method_search_success(self):
+        for query, room_ids in (('청담동', [1, 3]), ('방구석', [1]), ('힐링', [2]), ('청담동 고양이', [3]), ('없는말', [])):
+            response = self.client.get('/rooms', {'q' : query})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([room['room_id'] for room in response.json()['results']], room_ids)
+
+    def test_boolean_terms(self):
+        self.assertEqual(boolean_terms('청담동 +고양이 -"L7"*'), ['+청담동', '+고양이', '+l7'])
+        self.assertEqual(boolean_terms('!!'), [])
+
+    @override_settings(ROOM_SEARCH_MAX_RESULTS=1)
+    def test_room_list_view_get_method_search_caps_after_filtering(self):
+        response = self.client.get('/rooms', {'q' : '청담동'})
+
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [1])
+        self.assertTrue(response.json()['truncated'])
+
+        response = self.client.get('/rooms', {'q' : '청담동', 'price_max' : 80000})
+
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [3])
+        self.assertFalse(response.json()['truncated'])
+
+    def test_room_list_view_get_method_search_ranking_follows_updates(self):
+        self.assertEqual([room['room_id'] for room in self.client.get('/rooms', {'q' : '청담동'}).json()['results']], [1, 3])
+
+        room       = Room.objects.get(id=3)
+        room.title = '청담동 L7 Standard Double'
+        room.save()
+
+        self.assertEqual([room['room_id'] for room in self.client.get('/rooms', {'q' : '청담동'}).json()['results']], [3, 1])
+        self.assertEqual([room['room_id'] for room in self.client.get('/rooms', {'q' : '청담동', 'sort' : 'id'}).json()['results']], [1, 3])
+
+        Room.objects.get(id=1).delete()
+
+        self.assertEqual([room['room_id'] for room in self.client.get('/rooms', {'q' : '청담동'}).json()['results']], [3])
+
+    def test_room_list_view_get_method_facets_success(self):
+        with self.assertNumQueries(4):
+            response = self.client.get('/rooms', {'facets' : 1, 'price_max' : 100000})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [1, 3])
+        self.assertEqual(response.json()['facets'], {
+            'room_type'   : {'집 전체' : 1, '호텔 객실' : 1},
+            'room_option' : {'무선 인터넷' : 1, '헤어드라이어' : 1},
+            'price'       : [{'min' : 50000, 'max' : 100000, 'count' : 2}]
+        })
+
+    def test_room_list_view_get_method_facets_with_option_filter(self):
+        RoomOption.objects.create(room_id=1, option_id=2)
+
+        response = self.client.get('/rooms', {'facets' : 1, 'room_option' : '주방', 'cursor' : ''})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['room_id'] for room in response.json()['results']], [1, 2])
+        self.assertEqual(response.json()['facets']['room_option'], {'무선 인터넷' : 1, '주방' : 2})
+        self.assertEqual(response.json()['facets']['price'], [
+            {'min' : 50000, 'max' : 100000, 'count' : 1},
+            {'min' : 100000, 'max' : 150000, 'count' : 1}
+        ])
+
+    def test_room_list_view_get_method_facets_without_matches(self):
+        response = self.client.get('/rooms', {'facets' : 1, 'q' : '없는말'})
+
+        self.assertEqual(response.json(), {'results' : [], 'truncated' : False, 'facets' : {'room_type' : {}, 'room_option' : {}, 'price' : []}})
+
+    def test_room_list_view_get_method_requires_all_options(self):
+        RoomOption.objects.create(room_id=1, option_id=2)
+
+        for params, room_ids in (
+            ({'room_option' : ['무선 인터넷', '주방']}, [1]),
+            ({'room_option' : '주방'}, [1, 2]),
+            ({'room_option' : '주방', 'room_type' : ['개인실', '호텔 객실']}, [2]),
+            ({'room_option' : ['주방', '수영장']}, []),
+            ({'room_type' : ['집 전체', '호텔 객실']}, [1, 3]),
+        ):
+            response = self.client.get('/rooms', params)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([room['room_id'] for room in response.json()['results']], room_ids)
+
+            with override_settings(ROOM_BITMAP_MAX_IDS=0), patch('rooms.bitmaps.positions') as mocked_positions:
+                self.assertEqual([room['room_id'] for room in self.client.get('/rooms', params).json()['results']], room_ids)
+
+            if room_ids:
+                mocked_positions.assert_not_called()
+
+    def test_room_list_view_get_method_option_index_follows_updates(self):
+        self.assertEqual([room['room_id'] for room in self.client.get('/rooms', {'room_option' : '주방'}).json()['results']], [2])
+
+        RoomOption.objects.create(room_id=3, option_id=2)
+        RoomOption.objects.filter(room_id=2).delete()
+        Option.objects.filter(id=2).update(name='부엌')
+        Option.objects.get(id=2).save()
+
+        self.assertEqual([room['room_id'] for room in self.client.get('/rooms', {'room_option' : '부엌'}).json()['results']], [3])
+        self.assertEqual(self.client.get('/rooms', {'room_option' : '주방'}).json()['results'], [])
+
+    def create_pricing_rules(self):
+        PricingRule.objects.bulk_create([
+            PricingRule(id=1, room_id=1, kind=PricingRule.WEEKEND, percent=20),
+            PricingRule(id=2, room_id=2, kind=PricingRule.SEASON, percent=50, start_date='2021-12-24', end_date='2021-12-26'),
+            PricingRule(id=3, room_id=3, kind=PricingRule.LENGTH_OF_STAY, percent=-10, min_nights=3),
+        ])
+        call_command('rebuild_room_rates', stdout=StringIO())
+
+    def test_room_list_view_get_method_total_price(self):
+        self.create_pricing_rules()
+
+        stay     = {'check_in' : '2021-12-23', 'check_out' : '2021-12-26'}
+        response = self.client.get('/rooms', stay)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({room['room_id'] : room['total_price'] for room in response.json()['results']}, {1 : 333880, 2 : 439012, 3 : 202500})
+
+        for params, room_ids in (
+            ({'sort' : 'total_price'}, [3, 1, 2]),
+            ({'sort' : '-total_price'}, [2, 1, 3]),
+            ({'total_price_max' : 400000}, [1, 3]),
+            ({'total_price_min' : 300000, 'sort' : 'total_price'}, [1, 2]),
+        ):
+            response = self.client.get('/rooms', {**stay, **params})
+
+            self.assertEqual([room['room_id'] for room in response.json()['results']], room_ids)
+
+    def test_room_list_view_get_method_total_price_cursor_pagination(self):
+        self.create_pricing_rules()
+
+        room_ids = []
+        cursor   = ''
+
+        while cursor is not None:
+            response = self.client.get('/rooms', {'check_in' : '2021-12-23', 'check_out' : '2021-12-26', 'sort' : 'total_price', 'limit' : 1, 'cursor' : cursor})
+
+            room_ids += [room['room_id'] for room in response.json()['results']]
+            cursor    = response.json()['next_cursor']
+
+        self.assertEqual(room_ids, [3, 1, 2])
+
+    def test_room_list_view_get_method_total_price_follows_rule_edits(self):
+        self.create_pricing_rules()
+
+        stay = {'check_in' : '2021-12-23', 'check_out' : '2021-12-26'}
+        self.assertEqual(self.client.get('/rooms', stay).json()['results'][0]['total_price'], 333880)
+
+        PricingRule.objects.get(id=1).delete()
+        PricingRule.objects.create(room_id=1, kind=PricingRule.LENGTH_OF_STAY, percent=-50, min_nights=2)
+
+        self.assertEqual(self.client.get('/rooms', stay).json()['results'][0]['total_price'], 147300)
+
+        PricingRule.objects.create(room_id=1, kind=PricingRule.SEASON, percent=100, start_date=date(2021, 12, 25), end_date=date(2021, 12, 25))
+        self.assertEqual(self.client.get('/rooms', stay).json()['results'][0]['total_price'], 196400)
+
+        newest = PricingRule.objects.create(room_id=1, kind=PricingRule.SEASON, percent=50, start_date=date(2021, 12, 23), end_date=date(2021, 12, 25))
+        self.assertEqual(self.client.get('/rooms', stay).json()['results'][0]['total_price'], 220950)
+
+        newest.delete()
+        self.assertEqual(self.client.get('/rooms', stay).json()['results'][0]['total_price'], 196400)
+        self.assertEqual(list(RoomRate.objects.filter(room_id=1).values_list('date', 'percent')), [(date(2021, 12, 25), 100)])
+
+    def test_price_ceiling(self):
+        self.assertEqual(price_ceiling(3, 299999), 100000)
+
+        self.create_pricing_rules()
+        self.assertAlmostEqual(price_ceiling(3, 299999), 300000 / 2.7)
+
+        PricingRule.objects.create(room_id=2, kind=PricingRule.LENGTH_OF_STAY, percent=-100, min_nights=7)
+        self.assertIsNone(price_ceiling(3, 299999))
+
+    def test_pricing_rule_season_requires_dates(self):
+        for start_date, end_date in ((None, None), (date(2021, 12, 24), None), (date(2021, 12, 26), date(2021, 12, 24))):
+            with self.subTest(start_date=start_date, end_date=end_date), self.assertRaises(IntegrityError), transaction.atomic():
+                PricingRule.objects.create(room_id=1, kind=PricingRule.SEASON, percent=50, start_date=start_date, end_date=end_date)
+
+        PricingRule.objects.create(room_id=1, kind=PricingRule.SEASON, percent=50, start_date=date(2021, 12, 24), end_date=date(2021, 12, 24))
+
+    def test_pricing_rule_length_of_stay_requires_min_nights(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PricingRule.objects.create(room_id=1, kind=PricingRule.LENGTH_OF_STAY, percent=-10)
+
+        PricingRule.objects.create(room_id=1, kind=PricingRule.LENGTH_OF_STAY, percent=-10, min_nights=7)
+        PricingRule.objects.create(room_id=1, kind=PricingRule.WEEKEND, percent=20)
+
+    def test_room_list_view_get_method_total_price_invalid(self):
+        for key in ('total_price_min', 'total_price_max'):
+            with self.subTest(key):
+                response = self.client.get('/rooms', {'check_in' : '2021-12-23', 'check_out' : '2021-12-26', key : 'abc'})
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'message' : 'INVALID_PRICE'})
+
+    def test_room_list_view_get_method_invalid_pagination(self):
+        for params in ({'limit' : 0, 'cursor' : ''}, {'limit' : -1}, {'offset' : -1}, {'limit' : 'abc'}, {'offset' : '1.5'}):
+            with self.subTest(params):
+                response = self.client.get('/rooms', params)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'message' : 'INVALID_PAGINATION'})
+
+    def test_room_list_view_get_method_total_price_sort_requires_dates(self):
+        response = self.client.get('/rooms', {'sort' : 'total_price'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_SORT'})
+
 class DetailTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.maxDiff = None
         self.client = Client()
         User.objects.bulk_create([
@@ -655,4 +964,61 @@ class DetailTest(TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.json(), {
             "message": "INVALID_ROOMS"
-        })
\ No newline at end of file
+        })
+
+    def test_roomdetail_view_get_method_cache_hit(self):
+        first_response  = self.client.get('/rooms/1')
+        second_response = self.client.get('/rooms/1')
+
+        self.assertEqual(first_response['X-Cache'], 'MISS')
+        self.assertEqual(second_response['X-Cache'], 'HIT')
+        self.assertEqual(first_response.json(), second_response.json())
+        self.assertEqual(cache.get_many([room_detail_cache.key('stats:hits'), room_detail_cache.key('stats:misses')]), {})
+
+    def test_room_detail_cache_stats_command_requires_shared_backend(self):
+        with self.assertRaisesMessage(CommandError, 'LocMemCache keeps its counters inside each serving process'):
+            call_command('room_detail_cache_stats', stdout=StringIO())
+
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={'default' : {'BACKEND' : 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION' : location}}):
+                self.client.get('/rooms/1')
+                self.client.get('/rooms/1')
+
+                stdout = StringIO()
+                call_command('room_detail_cache_stats', stdout=stdout)
+
+        self.assertEqual(stdout.getvalue().strip(), 'hits=1 misses=1 hit_ratio=0.50')
+
+    def test_roomdetail_view_get_method_cache_invalidated(self):
+        self.client.get('/rooms/1')
+
+        RoomImage.objects.create(room_id=1, image_url='https://cdn.pixabay.com/photo/new.jpg')
+        User.objects.get(id=1).save()
+
+        response = self.client.get('/rooms/1')
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results']['room_info']['room_image'][-1], 'https://cdn.pixabay.com/photo/new.jpg')
+
+    def test_roomdetail_view_get_method_query_count(self):
+        with self.assertNumQueries(4):
+            self.client.get('/rooms/2')
+
+    def test_roomdetail_view_get_method_etag(self):
+        etag = self.client.get('/rooms/1')['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/rooms/1', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+        room       = Room.objects.get(id=1)
+        RoomImage.objects.create(room_id=1, image_url='https://cdn.pixabay.com/photo/new.jpg')
+        room.title = '새 이름'
+        room.save()
+
+        response = self.client.get('/rooms/1', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Room.objects.get(id=1).version, 3)
+        self.assertNotEqual(response['ETag'], etag)
@@ -1,110 +1,196 @@
 import json
 
-from django.views           import View
-from django.http            import JsonResponse
-from django.db.models       import Q, Count, Avg
-from datetime               import datetime, timedelta
+from django.views                 import View
+from django.utils.decorators      import method_decorator
+from django.views.decorators.http import condition
+from django.conf                  import settings
+from django.db.models             import Q
+from datetime                     import datetime
 
-from rooms.models           import Room
-from reservations.models    import Reservation
+from core.responses               import JsonResponse
+from core.geo                     import bounding_box, covering_cells, haversine_km
+from core.pagination              import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+from rooms.bitmaps                import filter_by_attributes
+from rooms.cache                  import room_detail_cache
+from rooms.facets                 import facet_counts
+from rooms.models                 import Room
+from rooms.search                 import search_rooms
+from rooms.pricing                import annotate_total_price, filter_total_price_max
+from rooms.serializers            import RoomDetailSerializer, RoomListSerializer, StayListSerializer
+from reservations.models          import RoomNight
+
+SORT_ORDERINGS = {
+    'id'             : 'id',
+    '-id'            : '-id',
+    'price'          : 'price',
+    '-price'         : '-price',
+    'review_rating'  : 'rating_avg',
+    '-review_rating' : '-rating_avg',
+    'review_count'   : 'review_count',
+    '-review_count'  : '-review_count',
+    'total_price'    : 'total_price',
+    '-total_price'   : '-total_price',
+}
+
+BOUNDS_PARAMS = ('sw_lat', 'sw_lng', 'ne_lat', 'ne_lng')
+
+def filter_by_area(rooms, params):
+    if params.get('near'):
+        latitude, longitude = (float(value) for value in params['near'].split(','))
+        radius_km           = float(params['radius_km'])
+
+        if not 0 < radius_km <= settings.GEO_MAX_RADIUS_KM:
+            raise ValueError(radius_km)
+
+        sw_lat, sw_lng, ne_lat, ne_lng = bounding_box(latitude, longitude, radius_km)
+
+    elif any(key in params for key in BOUNDS_PARAMS):
+        sw_lat, sw_lng, ne_lat, ne_lng = (float(params[key]) for key in BOUNDS_PARAMS)
+
+    else:
+        return rooms
+
+    if not (-90 <= sw_lat <= ne_lat <= 90 and -180 <= sw_lng <= ne_lng <= 180):
+        raise ValueError(params)
+
+    cells = covering_cells(sw_lat, sw_lng, ne_lat, ne_lng, settings.GEOHASH_PRECISION, settings.GEO_MAX_CELLS)
+
+    if cells is not None:
+        q = Q()
+        for cell in cells:
+            q |= Q(location__geohash__startswith=cell)
+
+        rooms = rooms.filter(q)
+
+    rooms = rooms.filter(
+        location__latitude__range  = (sw_lat, ne_lat),
+        location__longitude__range = (sw_lng, ne_lng)
+    )
+
+    if params.get('near'):
+        rooms = rooms.alias(distance_km=haversine_km('location__latitude', 'location__longitude', latitude, longitude))\
+                     .filter(distance_km__lte=radius_km)
+
+    return rooms
 
 class RoomListView(View):
     def get(self, request):
         check_in       = request.GET.get('check_in', None)
         check_out      = request.GET.get('check_out', None)
-        offset         = int(request.GET.get('offset', 0))
-        limit          = int(request.GET.get('limit', 15))
-        ordering       = request.GET.get('sort', 'id')
-        reserved_rooms = []
+        ordering       = SORT_ORDERINGS.get(request.GET.get('sort', 'id'))
+        cursor         = request.GET.get('cursor', None)
+        query          = request.GET.get('q', '').strip()
+        facets         = request.GET.get('facets') == '1'
+        stay           = bool(check_in and check_out)
+
+        if not ordering or (ordering.lstrip('-') == 'total_price' and not stay):
+            return JsonResponse({'message' : 'INVALID_SORT'}, status=400)
+
+        try:
+            offset = int(request.GET.get('offset', 0))
+            limit  = int(request.GET.get('limit', 15))
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_PAGINATION'}, status=400)
+
+        # A cursor page needs at least one row to point the next cursor at.
+        if offset < 0 or limit < 1:
+            return JsonResponse({'message' : 'INVALID_PAGINATION'}, status=400)
         
         filter_field = {
-            'location'    : 'location__address__icontains',  
-            'guest'       : 'max_guest__gte',
-            'price_max'   : 'price__lte',
-            'price_min'   : 'price__gte',
-            'room_type'   : 'room_type__name__in',
-            'room_option' : 'options__name__in',
+            'location'  : 'location__address__icontains',  
+            'guest'     : 'max_guest__gte',
+            'price_max' : 'price__lte',
+            'price_min' : 'price__gte',
         }
         filter_set = {
             filter_field.get(key) : value[0] for (key, value) in dict(request.GET).items() if filter_field.get(key)
         }
-        if filter_set.get('options__name__in'):
-            filter_set['options__name__in'] = request.GET.getlist('room_option')
-        if filter_set.get('room_type__name__in'):
-            filter_set['room_type__name__in'] = request.GET.getlist('room_type')
-        
         
-        if check_in and check_out: 
-            check_in_dt  = datetime.strptime(check_in, '%Y-%m-%d')  
-            check_out_dt = datetime.strptime(check_out, '%Y-%m-%d') 
-
-            q = Q()
-            q |= Q(check_in__range  = [check_in, check_out_dt-timedelta(days=1)])
-            q |= Q(check_out__range = [check_in_dt-timedelta(days=-1), check_out])
-
-            reserved_rooms = Reservation.objects.filter(q)
-
-        rooms = Room.objects.filter(**filter_set)\
-                            .exclude(reservation__in=reserved_rooms)\
-                            .select_related('room_type', 'location')\
-                            .prefetch_related('room_images', 'options', 'review_set')\
-                            .annotate(review_count=Count('review__id'))\
-                            .annotate(review_rating=Avg('review__rating'))\
-                            .order_by(ordering)[offset:offset+limit]     
-        results = [{
-            'room_id'      : room.id,
-            'title'        : room.title,
-            'price'        : float(room.price),
-            'days'         : (check_out_dt - check_in_dt).days if check_in else 0,
-            'room_detail'  : { 'max_guest' : room.max_guest,
-                                'bedroom'  : room.bedroom,
-                                'bed'      : room.bed,
-                                'bath'     : room.bath },
-            'room_type'    : room.room_type.name,
-            'room_options' : [option.name for option in room.options.all()],
-            'review'       : room.review_count,
-            'rating'       : room.review_rating,
-            'latitude'     : float(room.location.latitude),
-            'longitude'    : float(room.location.longitude),
-            'address'      : room.location.address,
-            'images'       : [image.image_url for image in room.room_images.all()],
-        } for room in rooms]
+        rooms = Room.objects.filter(**filter_set)
+        rooms = filter_by_attributes(rooms, request.GET.getlist('room_option'), request.GET.getlist('room_type'))
+
+        if stay: 
+            check_in_dt    = datetime.strptime(check_in, '%Y-%m-%d')  
+            check_out_dt   = datetime.strptime(check_out, '%Y-%m-%d') 
+            reserved_rooms = RoomNight.objects.filter(date__gte=check_in_dt, date__lt=check_out_dt).values('room_id')
+
+            try:
+                total_price_min = float(request.GET['total_price_min']) if request.GET.get('total_price_min') else None
+                total_price_max = float(request.GET['total_price_max']) if request.GET.get('total_price_max') else None
+            except ValueError:
+                return JsonResponse({'message' : 'INVALID_PRICE'}, status=400)
+
+            rooms = rooms.exclude(id__in=reserved_rooms)
+            rooms = annotate_total_price(rooms, check_in_dt.date(), check_out_dt.date())
+
+            if total_price_min is not None:
+                rooms = rooms.filter(total_price__gte=total_price_min)
+            if total_price_max is not None:
+                rooms = filter_total_price_max(rooms, (check_out_dt - check_in_dt).days, total_price_max)
+
+        try:
+            rooms = filter_by_area(rooms, request.GET)
+        except (KeyError, ValueError):
+            return JsonResponse({'message' : 'INVALID_LOCATION'}, status=400)
+
+        extra = {}
+
+        if query:
+            rooms, extra['truncated'] = search_rooms(rooms, query)
+
+            if 'sort' not in request.GET and cursor is None:
+                ordering = '-relevance'
+
+        if facets:
+            extra['facets'] = facet_counts(rooms)
+
+        rooms            = rooms.order_by(ordering, 'id')
+        serializer_class = StayListSerializer if stay else RoomListSerializer
+
+        if cursor is None:
+            serializer = serializer_class(rooms[offset:offset+limit])
+        else:
+            if cursor:
+                try:
+                    value, pk = decode_cursor(cursor, ordering)
+                except InvalidCursor:
+                    return JsonResponse({'message' : 'INVALID_CURSOR'}, status=400)
+
+                rooms = rooms.filter(keyset_filter(ordering, value, pk))
+
+            serializer = serializer_class(rooms[:limit+1])
+
+        days    = (check_out_dt - check_in_dt).days if stay else 0
+        results = [dict(room, days=days) for room in serializer.data[:limit]]
+
+        if cursor is None:
+            return JsonResponse({'results' : results, **extra}, status=200)
+
+        last_room   = serializer.rows[limit-1] if len(serializer.rows) > limit else None
+        next_cursor = encode_cursor(ordering, last_room[ordering.lstrip('-')], last_room['id']) if last_room else None
         
-        return JsonResponse({'results' : results}, status=200)
+        return JsonResponse({'results' : results, 'next_cursor' : next_cursor, **extra}, status=200)
+
+def room_etag(request, room_id):
+    version = Room.objects.filter(id = room_id).values_list('version', flat=True).first()
+
+    return f'room-{room_id}-{version}' if version else None
 
 class RoomDetailView(View):
+    @method_decorator(condition(etag_func=room_etag))
     def get(self, request, room_id):
-        try:
-            room           = Room.objects.get(id = room_id)
-
-            result = {
-                'room_info' : {
-                    'id'                  : room.id,
-                    'host'                : room.host_user.name,                    
-                    'room_type'           : room.room_type.name,
-                    'title'               : room.title,
-                    'description'         : room.description,
-                    'price'               : round(room.price,0),
-                    'max_guest'           : room.max_guest,
-                    'bedroom'             : room.bedroom,
-                    'bed'                 : room.bed,
-                    'bath'                : room.bath,
-                    'room_option'         : [{
-                        'roomOption_name' : room_option.name,
-                        'roomOption_url'  : room_option.image_url
-                    } for room_option in room.options.all()],
-                    'room_image' : [
-                        roomimage.image_url for roomimage in room.room_images.all()],
-                    'location'       : room.location.address,
-                    'latitude'       : float(room.location.latitude),
-                    'longitude'      : float(room.location.longitude)
-                }
-            }
-            return JsonResponse({'results' : result}, status = 200)
-
-        except Room.DoesNotExist:
-            return JsonResponse({"message" : "INVALID_ROOMS"}, status=404)
-
-        except KeyError:
-            return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+        result = room_detail_cache.get(room_id)
+        cached = result is not None
+
+        if not cached:
+            rooms = RoomDetailSerializer(Room.objects.filter(id = room_id)).data
+
+            if not rooms:
+                return JsonResponse({"message" : "INVALID_ROOMS"}, status=404)
+
+            result = {'room_info' : rooms[0]}
+            room_detail_cache.set(room_id, result)
 
+        response            = JsonResponse({'results' : result}, status = 200)
+        response['X-Cache'] = 'HIT' if cached else 'MISS'
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumbnail_url',
+            field=models.CharField(max_length=1000, null=True),
+        ),
+    ]
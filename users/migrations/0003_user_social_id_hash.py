@@ -0,0 +1,33 @@
+# Generated by Django 3.2.9 on 2026-10-18 21:29
+
+from django.db import migrations, models
+
+from users.models import hash_social_id
+
+
+def fill_social_id_hash(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+
+    for user in User.objects.exclude(social_id__isnull=True).exclude(social_id='').iterator():
+        user.social_id_hash = hash_social_id(user.social_id)
+        user.save(update_fields=['social_id_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_profile_thumbnail_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='social_id_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(fill_social_id_hash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['social_id_hash'], name='users_social_id_hash_idx'),
+        ),
+    ]
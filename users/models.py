@@ -1,18 +1,32 @@
+import hashlib
+
 from django.db      import models
 from core.models    import TimeStampModel
 
+def hash_social_id(social_id):
+    return hashlib.sha256(str(social_id).encode('utf-8')).hexdigest() if social_id not in (None, '') else None
+
 class User(TimeStampModel):
-    email             = models.EmailField(max_length=45, unique=True)
-    password          = models.CharField(max_length=200)
-    name              = models.CharField(max_length=45)
-    phone             = models.CharField(max_length=17, null=True)
-    profile_image_url  = models.CharField(max_length=1000, null=True)
-    social_id         = models.CharField(max_length=2000, null=True)
-    social_type       = models.CharField(max_length=100, null=True)
-    deleted_at        = models.DateTimeField(null=True)
+    email                 = models.EmailField(max_length=45, unique=True)
+    password              = models.CharField(max_length=200)
+    name                  = models.CharField(max_length=45)
+    phone                 = models.CharField(max_length=17, null=True)
+    profile_image_url     = models.CharField(max_length=1000, null=True)
+    profile_thumbnail_url = models.CharField(max_length=1000, null=True)
+    social_id             = models.CharField(max_length=2000, null=True)
+    social_id_hash        = models.CharField(max_length=64, null=True)
+    social_type           = models.CharField(max_length=100, null=True)
+    deleted_at            = models.DateTimeField(null=True)
     
     class Meta:
         db_table = 'users'
+        indexes  = [
+            models.Index(fields=['social_id_hash'], name='users_social_id_hash_idx'),
+        ]
         
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.social_id_hash = hash_social_id(self.social_id)
+        super().save(*args, **kwargs)
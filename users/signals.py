@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch          import receiver
+
+from core.images              import schedule, track
+from core.utils               import token_cache
+from users.models             import User
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate(instance.id)
+
+@receiver(post_init, sender=User)
+def track_profile_image(sender, instance, **kwargs):
+    track(instance)
+
+@receiver(post_save, sender=User)
+def process_profile_image(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule(instance, created, update_fields)
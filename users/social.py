@@ -0,0 +1,89 @@
+import hashlib, requests
+
+from asgiref.sync      import sync_to_async
+from collections       import namedtuple
+from django.conf       import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util      import Retry
+
+from core.http         import async_client
+
+SocialProfile = namedtuple('SocialProfile', ['social_id', 'name', 'email'])
+
+class InvalidSocialToken(Exception):
+    pass
+
+def build_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize = settings.SOCIAL_LOGIN_MAX_CONNECTIONS,
+        max_retries  = Retry(
+            total            = settings.SOCIAL_LOGIN_RETRIES,
+            read             = False,
+            backoff_factor   = settings.SOCIAL_LOGIN_BACKOFF,
+            status_forcelist = (429, 502, 503, 504),
+            raise_on_status  = False,
+        ),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+session = build_session()
+
+class SocialProvider:
+    name = None
+
+    def url(self):
+        raise NotImplementedError
+
+    def headers(self, token):
+        return {'Authorization': f'Bearer {token}'}
+
+    def parse(self, data):
+        raise NotImplementedError
+
+    def cache_key(self, token):
+        return f'social_profile:{self.name}:{hashlib.sha256(str(token).encode("utf-8")).hexdigest()}'
+
+    def profile(self, token):
+        profile = cache.get(self.cache_key(token))
+
+        if profile is None:
+            response = session.get(self.url(), headers=self.headers(token), timeout=settings.SOCIAL_LOGIN_TIMEOUT)
+            profile  = self.parse(response.json())
+            cache.set(self.cache_key(token), profile, settings.SOCIAL_PROFILE_CACHE_TIMEOUT)
+
+        return profile
+
+    async def aprofile(self, token):
+        # Django 3.2 has no async cache API; a shared backend would otherwise block the event loop on network I/O.
+        profile = await sync_to_async(cache.get)(self.cache_key(token))
+
+        if profile is None:
+            client   = await async_client()
+            response = await client.get(self.url(), headers=self.headers(token))
+            profile  = self.parse(response.json())
+            await sync_to_async(cache.set)(self.cache_key(token), profile, settings.SOCIAL_PROFILE_CACHE_TIMEOUT)
+
+        return profile
+
+class KakaoProvider(SocialProvider):
+    name = 'kakao'
+
+    def url(self):
+        return settings.KAKAO_USER_URL
+
+    def parse(self, data):
+        if data.get('code') == -401:
+            raise InvalidSocialToken(self.name)
+
+        return SocialProfile(
+            social_id = data['id'],
+            name      = data['kakao_account']['profile']['nickname'],
+            email     = data['kakao_account']['email'],
+        )
+
+PROVIDERS = {provider.name : provider for provider in [KakaoProvider()]}
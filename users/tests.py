@@ -1,14 +1,30 @@
+import io
+import asyncio
 import json
 import jwt
+import time
+import requests
+import threading
 
-from django.test                    import TestCase, Client, TransactionTestCase
+from http.server                    import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test                    import TestCase, Client, TransactionTestCase, override_settings
+from django.core.cache              import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock                  import patch, MagicMock
 from datetime                       import datetime, timedelta
 from config.settings                import SECRET_KEY, ALGORITHM
 from freezegun                      import freeze_time
+from moto                           import mock_aws
+from PIL                            import Image
+from asgiref.sync                   import sync_to_async
 
+from core.http                      import async_client
+from core.storages                  import MyS3Client
+from core.utils                     import token_cache
+from core.workers                   import PoolFull
 from users.models                   import User
+from users.social                   import PROVIDERS, SocialProfile
 
 
 class SignUpTest(TransactionTestCase):
@@ -161,9 +177,43 @@ class SignInTest(TestCase):
             }
         )
 
+    @override_settings(BCRYPT_ROUNDS=4)
+    def test_sign_in_rehashes_password(self):
+        client = Client()
+        user   = {
+            'email'   : 'minjbak@naver.com',
+            'password': '12q23w34e45r!'
+        }
+        
+        response = client.post('/users/signin', json.dumps(user), content_type = 'application/json')
+        password = User.objects.get(id=1).password
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(password.startswith('$2b$04$'))
+        self.assertEqual(client.post('/users/signin', json.dumps(user), content_type = 'application/json').status_code, 200)
+        
+    @patch('core.passwords.hasher')
+    def test_sign_in_too_many_requests(self, mocked_hasher):
+        client = Client()
+        user   = {
+            'email'   : 'minjbak@naver.com',
+            'password': '12q23w34e45r!'
+        }
+        
+        mocked_hasher.run = MagicMock(side_effect=PoolFull('password-hasher'))
+        response          = client.post('/users/signin', json.dumps(user), content_type = 'application/json')
+        
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json(), 
+            {
+                'message' : 'TOO_MANY_REQUESTS'
+            }
+        )
+
 class KakaoLoginTest(TransactionTestCase):
     reset_sequences = True
     def setUp(self):
+        cache.clear()
         User.objects.create(
             id        = 1,
             name      = '박민정',
@@ -175,8 +225,8 @@ class KakaoLoginTest(TransactionTestCase):
         User.objects.all().delete()
     
     @freeze_time('2019-01-02')
-    @patch('users.views.requests')
-    def test_kakao_login_new_user_success(self, mocked_requests):
+    @patch('users.social.session')
+    def test_kakao_login_new_user_success(self, mocked_session):
         client = Client()
         
         class MockResponse:
@@ -191,7 +241,7 @@ class KakaoLoginTest(TransactionTestCase):
                     }
                 }
         
-        mocked_requests.get = MagicMock(return_value = MockResponse())
+        mocked_session.get  = MagicMock(return_value = MockResponse())
         headers             = {'HTTP_Authorization': 'fake_access_token'}
         response            = client.get('/users/kakaologin', **headers)
         access_token        = jwt.encode({'user_id': 2, 'exp': datetime.strptime('2019-01-02', '%Y-%m-%d') + timedelta(days=7)}, SECRET_KEY, ALGORITHM)
@@ -205,8 +255,8 @@ class KakaoLoginTest(TransactionTestCase):
         )
     
     @freeze_time('2019-01-02')
-    @patch('users.views.requests')
-    def test_kakao_login_existing_user_success(self, mocked_requests):
+    @patch('users.social.session')
+    def test_kakao_login_existing_user_success(self, mocked_session):
         client = Client()
         
         class MockResponse:
@@ -221,7 +271,7 @@ class KakaoLoginTest(TransactionTestCase):
                     }
                 }
         
-        mocked_requests.get = MagicMock(return_value = MockResponse())
+        mocked_session.get  = MagicMock(return_value = MockResponse())
         headers             = {'HTTP_Authorization': 'fake_access_token'}
         response            = client.get('/users/kakaologin', **headers)
         access_token        = jwt.encode({'user_id': 1, 'exp': datetime.strptime('2019-01-02', '%Y-%m-%d') + timedelta(days=7)}, SECRET_KEY, ALGORITHM)
@@ -234,8 +284,8 @@ class KakaoLoginTest(TransactionTestCase):
             }
         )
         
-    @patch('users.views.requests')
-    def test_kakao_login_existing_user_success(self, mocked_requests):
+    @patch('users.social.session')
+    def test_kakao_login_existing_user_success(self, mocked_session):
         client = Client()
         
         class MockResponse:
@@ -250,7 +300,7 @@ class KakaoLoginTest(TransactionTestCase):
                     }
                 }
         
-        mocked_requests.get = MagicMock(return_value = MockResponse())
+        mocked_session.get  = MagicMock(return_value = MockResponse())
         headers             = {'HTTP_Authorization': 'fake_access_token'}
         response            = client.get('/users/kakaologin', **headers)
         access_token        = jwt.encode({'user_id': 1, 'exp': datetime.utcnow() + timedelta(days=7)}, SECRET_KEY, ALGORITHM)
@@ -263,8 +313,8 @@ class KakaoLoginTest(TransactionTestCase):
             }
         )
         
-    @patch('users.views.requests')
-    def test_kakao_login_invalid_token(self, mocked_requests):
+    @patch('users.social.session')
+    def test_kakao_login_invalid_token(self, mocked_session):
         client = Client()
         
         class MockResponse:
@@ -274,7 +324,7 @@ class KakaoLoginTest(TransactionTestCase):
                     "msg": "InvalidTokenException"
                 }
         
-        mocked_requests.get = MagicMock(return_value = MockResponse())
+        mocked_session.get  = MagicMock(return_value = MockResponse())
         headers             = {'HTTP_Authorization': 'fake_access_token'}
         response            = client.get('/users/kakaologin', **headers)
         
@@ -285,6 +335,29 @@ class KakaoLoginTest(TransactionTestCase):
             }
         )
 
+    @patch('users.social.session')
+    def test_kakao_login_reuses_cached_profile(self, mocked_session):
+        client = Client()
+        
+        class MockResponse:
+            def json(self):
+                return {
+                    "id": 1997422419,
+                    "kakao_account": {
+                        "profile": {
+                        "nickname": "박민정"
+                        },
+                        "email": "angelmin00@naver.com"
+                    }
+                }
+        
+        mocked_session.get  = MagicMock(return_value = MockResponse())
+        headers             = {'HTTP_Authorization': 'fake_access_token'}
+        
+        self.assertEqual(client.get('/users/kakaologin', **headers).status_code, 200)
+        self.assertEqual(client.get('/users/kakaologin', **headers).status_code, 200)
+        self.assertEqual(mocked_session.get.call_count, 1)
+
 class UserProfileUploadTest(TestCase):
     def setUp(self):
         User.objects.create(
@@ -372,3 +445,272 @@ class UserProfileUploadTest(TestCase):
         
         self.assertEqual(response.json(), {'message' : 'KEY_ERROR'})
         self.assertEqual(response.status_code, 400)
+
+@mock_aws
+class S3UploadTest(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        User.objects.create(
+            id       = 1,
+            name     = '민정',
+            email    = 'minjbak@naver.com',
+            password = '$2b$12$FCUz7aU5O.PbJOc73iGgYuGtNnkFpR2mjrWkcK3/SF4Oqy6r4Hmgi',
+            phone    = '111-1111-1111'
+        )
+        self.storage = MyS3Client('testing', 'testing', 'wearebnb-test')
+        self.storage.s3_client.create_bucket(
+            Bucket                    = 'wearebnb-test',
+            CreateBucketConfiguration = {'LocationConstraint' : 'ap-northeast-2'}
+        )
+        self.headers = {'HTTP_Authorization': jwt.encode({'user_id': 1, 'exp': datetime.utcnow() + timedelta(days=1)}, SECRET_KEY, ALGORITHM)}
+
+        for target in ('users.views.s3_client', 'core.images.s3_client'):
+            patcher = patch(target, self.storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def test_server_side_upload(self):
+        file = SimpleUploadedFile(
+            name         = 'test.png',
+            content      = b'file_content',
+            content_type = 'image/png'
+        )
+
+        response = self.client.post('/users/profile-upload', {'filename' : file}, **self.headers)
+        key      = User.objects.get(id=1).profile_image_url.rsplit('/', 1)[1]
+        uploaded = self.storage.s3_client.get_object(Bucket='wearebnb-test', Key=key)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(uploaded['Body'].read(), b'file_content')
+        self.assertEqual(uploaded['ContentType'], 'image/png')
+
+    def test_presigned_upload(self):
+        response = self.client.post('/users/profile-upload/presigned', json.dumps({'content_type' : 'image/png'}), content_type = 'application/json', **self.headers)
+        upload   = response.json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(upload['key'].startswith('profile/1/'))
+
+        uploaded = requests.post(upload['url'], data=upload['fields'], files={'file' : ('test.png', b'file_content')})
+        response = self.client.patch('/users/profile-upload/presigned', json.dumps({'key' : upload['key']}), content_type = 'application/json', **self.headers)
+
+        self.assertEqual(uploaded.status_code, 204)
+        self.assertEqual(response.json(), {'message' : 'SUCCESS'})
+        self.assertEqual(User.objects.get(id=1).profile_image_url, f"https://wearebnb-test.s3.ap-northeast-2.amazonaws.com/{upload['key']}")
+
+    @patch('core.images.image_processor')
+    def test_presigned_upload_deletes_replaced_image(self, mocked_processor):
+        mocked_processor.submit.side_effect = lambda func, *args: func(*args)
+        image                               = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(image, 'PNG')
+
+        keys, thumbnails = [], []
+        for _ in range(2):
+            upload = self.client.post('/users/profile-upload/presigned', json.dumps({'content_type' : 'image/png'}), content_type = 'application/json', **self.headers).json()
+            self.storage.s3_client.put_object(Bucket='wearebnb-test', Key=upload['key'], Body=image.getvalue())
+            keys.append(upload['key'])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch('/users/profile-upload/presigned', json.dumps({'key' : upload['key']}), content_type = 'application/json', **self.headers)
+
+            thumbnails.append(self.storage.key(User.objects.get(id=1).profile_thumbnail_url))
+
+        self.assertFalse(self.storage.exists(keys[0]))
+        self.assertTrue(self.storage.exists(keys[1]))
+        self.assertNotEqual(thumbnails[0], thumbnails[1])
+        self.assertFalse(self.storage.exists(thumbnails[0]))
+        self.assertTrue(self.storage.exists(thumbnails[1]))
+
+    def test_presigned_upload_invalid_content_type(self):
+        response = self.client.post('/users/profile-upload/presigned', json.dumps({'content_type' : 'text/html'}), content_type = 'application/json', **self.headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_CONTENT_TYPE'})
+
+    def test_presigned_upload_not_uploaded(self):
+        response = self.client.patch('/users/profile-upload/presigned', json.dumps({'key' : 'profile/1/missing'}), content_type = 'application/json', **self.headers)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'message' : 'FILE_NOT_FOUND'})
+
+    def test_presigned_upload_other_users_key(self):
+        response = self.client.patch('/users/profile-upload/presigned', json.dumps({'key' : 'profile/2/someone-else'}), content_type = 'application/json', **self.headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'message' : 'INVALID_KEY'})
+
+class TokenCacheTest(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        User.objects.create(
+            id       = 1,
+            name     = '민정',
+            email    = 'minjbak@naver.com',
+            password = '$2b$12$FCUz7aU5O.PbJOc73iGgYuGtNnkFpR2mjrWkcK3/SF4Oqy6r4Hmgi',
+            phone    = '111-1111-1111'
+        )
+        self.headers = {'HTTP_Authorization': jwt.encode({'user_id': 1, 'exp': datetime.utcnow() + timedelta(days=1)}, SECRET_KEY, ALGORITHM)}
+
+    def tearDown(self):
+        User.objects.all().delete()
+        token_cache.clear()
+
+    def test_cached_token_skips_user_query(self):
+        client = Client()
+
+        client.get('/users/profile', **self.headers)
+
+        with self.assertNumQueries(0):
+            response = client.get('/users/profile', **self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result']['name'], '민정')
+
+    def test_user_update_invalidates_token(self):
+        client = Client()
+
+        client.get('/users/profile', **self.headers)
+        User.objects.get(id=1).save()
+
+        with self.assertNumQueries(1):
+            client.get('/users/profile', **self.headers)
+
+    def test_deleted_user(self):
+        client = Client()
+        user   = User.objects.get(id=1)
+
+        client.get('/users/profile', **self.headers)
+        user.deleted_at = datetime.now()
+        user.save()
+
+        response = client.get('/users/profile', **self.headers)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'message': 'UNKNOWN_USER'})
+
+    def test_expired_token(self):
+        client       = Client()
+        access_token = jwt.encode({'user_id': 1, 'exp': datetime.utcnow() - timedelta(seconds=1)}, SECRET_KEY, ALGORITHM)
+
+        response = client.get('/users/profile', HTTP_Authorization=access_token)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'message': 'INVALID_TOKEN'})
+
+class KakaoStubHandler(BaseHTTPRequestHandler):
+    profiles = {
+        'Bearer fake_access_token': {
+            'id'            : 1997422419,
+            'kakao_account' : {'profile': {'nickname': '박민정'}, 'email': 'angelmin00@naver.com'}
+        },
+        'Bearer new_access_token': {
+            'id'            : 1997422418,
+            'kakao_account' : {'profile': {'nickname': '박민'}, 'email': 'angelmin@naver.com'}
+        },
+    }
+
+    def do_GET(self):
+        token = self.headers.get('Authorization')
+
+        if token == 'Bearer slow_access_token':
+            time.sleep(0.5)
+
+        body = json.dumps(self.profiles.get(token, {'msg': 'this access token does not exist', 'code': -401})).encode('utf-8')
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+class KakaoLoginAsyncTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), KakaoStubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.kakao_url = f'http://127.0.0.1:{cls.server.server_address[1]}/v2/user/me'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create(
+            id        = 1,
+            name      = '박민정',
+            email     = 'angelmin00@naver.com',
+            social_id = 1997422419
+        )
+
+    def tearDown(self):
+        User.objects.all().delete()
+
+    def login(self, token):
+        with self.settings(KAKAO_USER_URL=self.kakao_url, SOCIAL_LOGIN_TIMEOUT=0.2):
+            return Client().get('/users/kakaologin/async', HTTP_Authorization=token)
+
+    def test_kakao_login_async_existing_user(self):
+        response = self.login('fake_access_token')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(jwt.decode(response.json()['access_token'], SECRET_KEY, ALGORITHM)['user_id'], 1)
+
+    def test_kakao_login_async_new_user(self):
+        response = self.login('new_access_token')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(User.objects.filter(email='angelmin@naver.com', social_type='kakao').exists())
+
+    def test_kakao_login_async_invalid_token(self):
+        response = self.login('expired_access_token')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'message': 'INVALID_TOKEN'})
+
+    def test_kakao_login_async_timeout(self):
+        response = self.login('slow_access_token')
+
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json(), {'message': 'SOCIAL_LOGIN_TIMEOUT'})
+
+    def test_async_client_closed_with_its_loop(self):
+        async def clients():
+            return await async_client(), await async_client()
+
+        first, second = asyncio.run(clients())
+
+        self.assertIs(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertIsNot(asyncio.run(async_client()), first)
+
+    @patch('users.social.async_client')
+    def test_aprofile_reuses_cached_profile(self, mocked_client):
+        provider = PROVIDERS['kakao']
+        profile  = SocialProfile(social_id=1997422419, name='박민정', email='angelmin00@naver.com')
+        cache.set(provider.cache_key('Bearer cached_access_token'), profile)
+
+        with patch('users.social.sync_to_async', wraps=sync_to_async) as mocked_sync_to_async:
+            self.assertEqual(asyncio.run(provider.aprofile('Bearer cached_access_token')), profile)
+
+        mocked_client.assert_not_called()
+        mocked_sync_to_async.assert_called_once()
+
+    def test_kakao_login_timeout(self):
+        with self.settings(KAKAO_USER_URL=self.kakao_url, SOCIAL_LOGIN_TIMEOUT=0.2):
+            response = Client().get('/users/kakaologin', HTTP_Authorization='slow_access_token')
+
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json(), {'message': 'SOCIAL_LOGIN_TIMEOUT'})
@@ -1,12 +1,14 @@
 from django.urls import path
 
-from users.views import SignInView, SignUpView, KakaoLoginView, UserProfileView, UserProfileUploadView
+from users.views import SignInView, SignUpView, KakaoLoginView, UserProfileView, UserProfileUploadView, UserProfilePresignedUploadView, kakao_login_async
 
 app_name = 'users'
 urlpatterns = [
-    path("/signup"        , SignUpView.as_view()),
-    path("/signin"        , SignInView.as_view()),
-    path("/kakaologin"    , KakaoLoginView.as_view()),
-    path("/profile"       , UserProfileView.as_view()),
-    path("/profile-upload", UserProfileUploadView.as_view()),
+    path("/signup"                  , SignUpView.as_view()),
+    path("/signin"                  , SignInView.as_view()),
+    path("/kakaologin"              , KakaoLoginView.as_view()),
+    path("/kakaologin/async"        , kakao_login_async),
+    path("/profile"                 , UserProfileView.as_view()),
+    path("/profile-upload"          , UserProfileUploadView.as_view()),
+    path("/profile-upload/presigned", UserProfilePresignedUploadView.as_view()),
 ]
\ No newline at end of file
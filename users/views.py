@@ -1,15 +1,23 @@
-import jwt, bcrypt, re
+import jwt, re
 import json
+import uuid
+import httpx
 import requests
 
+from asgiref.sync    import sync_to_async
+from django.conf     import settings
 from django.views    import View
-from django.http     import JsonResponse
 from datetime        import datetime, timedelta
 
 from config.settings import SECRET_KEY, ALGORITHM
-from users.models    import User
+from users.models    import User, hash_social_id
+from users.social    import PROVIDERS, InvalidSocialToken
+from core.responses  import JsonResponse
 from core.utils      import login_required
+from core.passwords  import check_password, hash_password, rehash_if_needed
+from core.workers    import PoolFull
 from core.storages   import FileUpload, s3_client
+from core.images     import discard
 
 class SignUpView(View):
     def post(self, request):
@@ -31,7 +39,7 @@ class SignUpView(View):
             if User.objects.filter(email=email).exists():
                 return JsonResponse({'message': 'DUPLICATE_EMAIL_ERROR'}, status=400)
             
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            hashed_password = hash_password(password)
             
             User.objects.create(name=name, password=hashed_password, email=email)
             
@@ -40,6 +48,9 @@ class SignUpView(View):
         except KeyError:
             return JsonResponse({'message': 'KEY_ERROR'}, status=400)
 
+        except PoolFull:
+            return JsonResponse({'message': 'TOO_MANY_REQUESTS'}, status=429)
+
 class SignInView(View):
     def post(self, request):
         try:
@@ -52,9 +63,11 @@ class SignInView(View):
             if user.deleted_at != None:
                 return JsonResponse({'message': 'UNACTIVATED_USER'}, status=403)
 
-            if not bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
+            if not check_password(password, user.password):
                 return JsonResponse({'message': 'INVALID_PASSWORD'}, status=401)
 
+            rehash_if_needed(user, password)
+
             return JsonResponse({'message': 'SUCCESS', 'access_token': access_token}, status=200)
 
         except jwt.ExpiredSignatureError:
@@ -65,40 +78,68 @@ class SignInView(View):
 
         except User.DoesNotExist:
             return JsonResponse({'message': 'INVALID_USER'}, status=404)
+
+        except PoolFull:
+            return JsonResponse({'message': 'TOO_MANY_REQUESTS'}, status=429)
         
 class KakaoLoginView(View):
     def get(self, request):
         try:
             kakao_token = request.headers.get('Authorization', None)
-            
-            kakao_url = 'https://kapi.kakao.com/v2/user/me'
-            headers   = {'Authorization': f'Bearer {kakao_token}'}
-            
-            kakao_response = requests.get(kakao_url, headers = headers, timeout = 5).json()
-            
-            if kakao_response.get('code') == -401:
-                return JsonResponse({'message' : 'INVALID_TOKEN'}, status=401)
-            
-            social_id = kakao_response['id']
-            name      = kakao_response['kakao_account']['profile']['nickname']
-            email     = kakao_response['kakao_account']['email']
+            profile     = PROVIDERS['kakao'].profile(kakao_token)
             
             user, created = User.objects.get_or_create(
-                social_id = social_id,
-                email     = email,
-                defaults  = {'social_type' : 'kakao', 'name' : name}
+                social_id_hash = hash_social_id(profile.social_id),
+                email          = profile.email,
+                defaults       = {'social_id' : profile.social_id, 'social_type' : 'kakao', 'name' : profile.name}
             )
             
             access_token = jwt.encode({'user_id': user.id, 'exp': datetime.utcnow() + timedelta(days=7)}, SECRET_KEY, ALGORITHM)
             
             return JsonResponse({'message': 'SUCCESS', 'access_token': access_token}, status=200)            
         
+        except InvalidSocialToken:
+            return JsonResponse({'message' : 'INVALID_TOKEN'}, status=401)
+        
+        except requests.Timeout:
+            return JsonResponse({'message': 'SOCIAL_LOGIN_TIMEOUT'}, status=504)
+        
+        except (requests.RequestException, ValueError):
+            return JsonResponse({'message': 'SOCIAL_LOGIN_ERROR'}, status=502)
+        
         except User.DoesNotExist:
             return JsonResponse({'message': 'INVALID_USER'}, status=404)
         
         except KeyError:
             return JsonResponse({'message': 'KEY_ERROR'}, status=400)
         
+async def kakao_login_async(request):
+    try:
+        kakao_token = request.headers.get('Authorization', None)
+        profile     = await PROVIDERS['kakao'].aprofile(kakao_token)
+
+        user, created = await sync_to_async(User.objects.get_or_create)(
+            social_id_hash = hash_social_id(profile.social_id),
+            email          = profile.email,
+            defaults       = {'social_id' : profile.social_id, 'social_type' : 'kakao', 'name' : profile.name}
+        )
+
+        access_token = jwt.encode({'user_id': user.id, 'exp': datetime.utcnow() + timedelta(days=7)}, SECRET_KEY, ALGORITHM)
+
+        return JsonResponse({'message': 'SUCCESS', 'access_token': access_token}, status=200)
+
+    except InvalidSocialToken:
+        return JsonResponse({'message' : 'INVALID_TOKEN'}, status=401)
+
+    except httpx.TimeoutException:
+        return JsonResponse({'message': 'SOCIAL_LOGIN_TIMEOUT'}, status=504)
+
+    except (httpx.HTTPError, ValueError):
+        return JsonResponse({'message': 'SOCIAL_LOGIN_ERROR'}, status=502)
+
+    except KeyError:
+        return JsonResponse({'message': 'KEY_ERROR'}, status=400)
+
 class UserProfileView(View):
     @login_required
     def get(self, request):
@@ -113,6 +154,16 @@ class UserProfileView(View):
         
         return JsonResponse({'result' : result}, status=200)
     
+def replace_profile_image(user, profile_image_url):
+    previous_urls = [user.profile_image_url, user.profile_thumbnail_url]
+
+    user.profile_image_url     = profile_image_url
+    user.profile_thumbnail_url = None
+    user.save(update_fields=['profile_image_url', 'profile_thumbnail_url', 'updated_at'])
+
+    if previous_urls[0] != profile_image_url:
+        discard(previous_urls)
+
 class UserProfileUploadView(View):
     @login_required    
     def post(self, request):
@@ -123,9 +174,45 @@ class UserProfileUploadView(View):
             if not profile_image_url:
                 return JsonResponse({'message' : 'FILE_UPLOAD_ERROR'}, status=400)
 
+            replace_profile_image(request.user, profile_image_url)
+
+            return JsonResponse({'message' : 'SUCCESS'}, status=200)
+
+        except KeyError:
+            return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+
+class UserProfilePresignedUploadView(View):
+    @login_required
+    def post(self, request):
+        try:
+            data         = json.loads(request.body)
+            content_type = data['content_type']
+
+            if content_type not in settings.S3_UPLOAD_CONTENT_TYPES:
+                return JsonResponse({'message' : 'INVALID_CONTENT_TYPE'}, status=400)
+
+            key    = f'profile/{request.user.id}/{uuid.uuid4()}'
+            upload = s3_client.presigned_post(key, content_type)
+
+            return JsonResponse({'key' : key, 'url' : upload['url'], 'fields' : upload['fields']}, status=200)
+
+        except KeyError:
+            return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+
+    @login_required
+    def patch(self, request):
+        try:
+            data = json.loads(request.body)
+            key  = data['key']
             user = request.user
-            user.profile_image_url = profile_image_url
-            user.save()
+
+            if not key.startswith(f'profile/{user.id}/'):
+                return JsonResponse({'message' : 'INVALID_KEY'}, status=400)
+
+            if not s3_client.exists(key):
+                return JsonResponse({'message' : 'FILE_NOT_FOUND'}, status=404)
+
+            replace_profile_image(user, s3_client.url(key))
 
             return JsonResponse({'message' : 'SUCCESS'}, status=200)
 